@@ -0,0 +1,63 @@
+"""
+Throughput benchmark for non-interactive (-c / -f) mode.
+
+Runs the same command mix once as a single script in one PyTerminal process,
+and once as one `main.py -c` process per command (on a sample, extrapolated),
+and reports commands per second for both.
+
+Usage: python benchmarks/bench_batch.py [--commands N] [--spawn-sample N]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+MAIN = os.path.join(SRC, "main.py")
+
+
+def make_commands(directory, count):
+    for i in range(20):
+        with open(os.path.join(directory, f"file{i}.txt"), "w") as f:
+            f.write("line\n" * 50)
+    mix = [
+        "pwd",
+        f"ls {directory} --limit 5",
+        f"cat {os.path.join(directory, 'file3.txt')} --head 3",
+        f"ls {directory} --sort size --limit 3",
+        "help",
+    ]
+    return [mix[i % len(mix)] for i in range(count)]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--commands", type=int, default=2000, help="number of commands to run")
+    ap.add_argument("--spawn-sample", type=int, default=20, help="commands actually spawned one process each")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="pyterminal-bench-") as tmp:
+        commands = make_commands(tmp, args.commands)
+        script = os.path.join(tmp, "bench.pyt")
+        with open(script, "w") as f:
+            f.write("\n".join(commands) + "\n")
+
+        start = time.perf_counter()
+        subprocess.run([sys.executable, MAIN, "-f", script], stdout=subprocess.DEVNULL, check=True)
+        batch = time.perf_counter() - start
+        print(f"one process   {len(commands):6d} commands  {batch:8.2f} s  {len(commands) / batch:10.1f} cmd/s")
+
+        sample = commands[: args.spawn_sample]
+        start = time.perf_counter()
+        for command in sample:
+            subprocess.run([sys.executable, MAIN, "-c", command], stdout=subprocess.DEVNULL, check=True)
+        spawned = (time.perf_counter() - start) / len(sample)
+        print(f"per command   {len(sample):6d} commands  {spawned * len(sample):8.2f} s  {1 / spawned:10.1f} cmd/s"
+              f"  (~{spawned * len(commands):.1f} s for all {len(commands)})")
+        print(f"speedup       {spawned * len(commands) / batch:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
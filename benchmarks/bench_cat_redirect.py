@@ -0,0 +1,92 @@
+"""
+Throughput benchmark for `cat a b ... > c`.
+
+Compares the current streaming implementation (kernel-side copies) against the
+previous one, which read every source into memory and joined the strings.
+
+Usage: python benchmarks/bench_cat_redirect.py [--files N] [--size-mb MB] [--skip-legacy]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from commands.filesystem import FileSystemCommands
+from utils.output import CaptureOutput
+
+
+def legacy_concat(files, target_path):
+    """The pre-streaming redirect path: read everything, join, write."""
+    output_data = []
+    for file_path in files:
+        with open(file_path, "r") as f:
+            output_data.append(f.read())
+    with open(target_path, "w") as f:
+        f.write("\n".join(output_data))
+
+
+def make_fixtures(directory, count, size_mb):
+    line = b"x" * 1023 + b"\n"
+    block = line * 1024  # 1 MB
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"src{i}.log")
+        with open(path, "wb") as f:
+            for _ in range(size_mb):
+                f.write(block)
+        paths.append(path)
+    return paths
+
+
+def measure(label, func, total_bytes, trace_memory):
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    peak = 0
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    rate = total_bytes / (1024 ** 2) / elapsed if elapsed else float("inf")
+    print(f"{label:<10} {elapsed:8.3f} s  {rate:10.1f} MB/s  peak Python memory {peak / (1024 ** 2):8.1f} MB")
+    return elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--files", type=int, default=3, help="number of source files")
+    ap.add_argument("--size-mb", type=int, default=256, help="size of each source file in MB")
+    ap.add_argument("--skip-legacy", action="store_true", help="only run the current implementation")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="pyterminal-bench-") as tmp:
+        sources = make_fixtures(tmp, args.files, args.size_mb)
+        total = sum(os.path.getsize(p) for p in sources)
+        print(f"Concatenating {args.files} files, {total / (1024 ** 3):.2f} GB total")
+
+        fs = FileSystemCommands()
+        fs.current_dir = tmp
+        streaming = measure(
+            "streaming",
+            lambda: fs.cat([os.path.basename(p) for p in sources] + [">", "out_streaming"], CaptureOutput()),
+            total,
+            trace_memory=True,
+        )
+
+        if not args.skip_legacy:
+            legacy = measure(
+                "legacy",
+                lambda: legacy_concat(sources, os.path.join(tmp, "out_legacy")),
+                total,
+                trace_memory=True,
+            )
+            print(f"speedup    {legacy / streaming:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+Benchmark suite for PyTerminal's command and agent hot paths.
+
+Generates fixtures (many small files, a few huge files, a deep tree) in a
+temporary directory, runs every case a few times and reports the best
+throughput plus the peak Python memory of one extra traced run. Results are
+compared with a stored baseline; the run fails (exit status 1) when a case is
+slower than the baseline by more than the threshold.
+
+Baselines are machine specific, so none is checked in: record one with
+--update-baseline on the machine that runs the comparison. Without a baseline
+the suite only reports its numbers.
+
+Usage: python benchmarks/suite.py [--quick] [--repeat N] [--threshold F]
+                                  [--only NAME ...] [--baseline PATH] [--update-baseline]
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "src"))
+
+# Keep caches and history of the benchmark runs out of the user's data directory
+_DATA_DIR = tempfile.mkdtemp(prefix="pyterminal-bench-home-")
+os.environ["PYTERMINAL_HOME"] = _DATA_DIR
+
+from rich.console import Console
+from commands.filesystem import FileSystemCommands
+from commands.system import SystemCommands
+from utils.metrics import MetricsCollector
+from utils.output import CaptureOutput, PlainOutput
+from utils.parser import CommandParser
+
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+
+
+class Case:
+    """
+    One benchmark: run() does the measured work and returns the number of units
+    processed; setup() runs untimed before every repetition.
+    """
+
+    def __init__(self, name, unit, run, setup=None):
+        self.name = name
+        self.unit = unit
+        self.run = run
+        self.setup = setup
+
+
+def make_fixtures(root, scale):
+    small = os.path.join(root, "small")
+    os.makedirs(small)
+    payload = b"x" * 1023 + b"\n"
+    for i in range(5000 * scale):
+        with open(os.path.join(small, f"file{i:06d}.txt"), "wb") as f:
+            f.write(payload * (1 + i % 4))
+
+    huge = []
+    line = b"y" * 127 + b"\n"
+    for i in range(2):
+        path = os.path.join(root, f"huge{i}.log")
+        with open(path, "wb") as f:
+            block = line * 8192  # 1 MB
+            for _ in range(32 * scale):
+                f.write(block)
+        huge.append(path)
+
+    deep = os.path.join(root, "deep")
+    current = deep
+    for depth in range(40):
+        current = os.path.join(current, f"level{depth}")
+        os.makedirs(current)
+        for i in range(25 * scale):
+            with open(os.path.join(current, f"f{i}.txt"), "wb") as f:
+                f.write(payload)
+    return SimpleNamespace(root=root, small=small, huge=huge, deep=deep)
+
+
+def stub_client(tool_path):
+    """A fake Gemini client: one find_files call, then a text answer."""
+    from google.genai import types
+
+    def chunk(parts):
+        return types.GenerateContentResponse(
+            candidates=[types.Candidate(content=types.Content(role="model", parts=parts))]
+        )
+
+    call = types.Part(function_call=types.FunctionCall(name="find_files", args={"path": tool_path, "name": "*.txt"}))
+    answer = types.Part(text="There are several text files.")
+
+    class Models:
+        def __init__(self):
+            self.turn = 0
+
+        def generate_content_stream(self, model, contents, config):
+            self.turn += 1
+            yield chunk([call] if self.turn % 2 else [answer])
+
+    return SimpleNamespace(models=Models())
+
+
+def build_cases(fx, devnull):
+    fs = FileSystemCommands()
+    fs.current_dir = fx.root
+    metrics = MetricsCollector(interval=0.5)
+    metrics.start()
+    system = SystemCommands(metrics)
+    quiet = Console(file=devnull, width=120)
+    parser = CommandParser(quiet)
+    small_count = len(os.listdir(fx.small))
+    huge_bytes = sum(os.path.getsize(p) for p in fx.huge)
+    deep_files = sum(len(files) for _, _, files in os.walk(fx.deep))
+    scratch = os.path.join(fx.root, "scratch")
+
+    def copy_deep():
+        shutil.rmtree(scratch, ignore_errors=True)
+        shutil.copytree(fx.deep, scratch)
+
+    def make_movable():
+        shutil.rmtree(scratch, ignore_errors=True)
+        os.makedirs(os.path.join(scratch, "from"))
+        os.makedirs(os.path.join(scratch, "to"))
+        for i in range(500):
+            open(os.path.join(scratch, "from", f"m{i}"), "w").close()
+
+    def ls(args):
+        fs.ls(args, CaptureOutput())
+        return small_count
+
+    def cat_huge():
+        fs.cat([fx.huge[0]], PlainOutput(devnull))
+        return os.path.getsize(fx.huge[0])
+
+    def cat_redirect():
+        fs.cat(fx.huge + [">", os.path.join(fx.root, "joined.log")], CaptureOutput())
+        return huge_bytes
+
+    def rm_tree():
+        fs.rm(["-r", scratch], CaptureOutput())
+        return deep_files
+
+    def mv_files():
+        for i in range(500):
+            fs.mv([os.path.join(scratch, "from", f"m{i}"), os.path.join(scratch, "to")], CaptureOutput())
+        return 500
+
+    def processes():
+        out = CaptureOutput()
+        system.processes([], out)
+        return len(out.records[0]["rows"])
+
+    def execute(capture):
+        def run():
+            for _ in range(200):
+                parser.execute(f"ls {fx.small} --limit 20", capture_output=capture)
+            return 200
+        return run
+
+    def agent_loop():
+        import nlp
+
+        for _ in range(20):
+            nlp.clear_caches()
+            parser.conversation.clear()
+            nlp.process_nlp_input("which text files are there", parser, quiet, client=stub_client(fx.deep))
+        return 20
+
+    cases = [
+        Case("ls_small", "entries/s", lambda: ls([fx.small])),
+        Case("ls_sort_size", "entries/s", lambda: ls([fx.small, "--sort", "size", "--limit", "50"])),
+        Case("cat_huge", "MB/s", cat_huge),
+        Case("cat_redirect", "MB/s", cat_redirect),
+        Case("rm_tree", "files/s", rm_tree, setup=copy_deep),
+        Case("mv_files", "files/s", mv_files, setup=make_movable),
+        Case("processes", "rows/s", processes),
+        Case("execute_printed", "cmd/s", execute(False)),
+        Case("execute_captured", "cmd/s", execute(True)),
+        Case("agent_loop", "prompts/s", agent_loop),
+    ]
+    return cases, metrics
+
+
+def measure(case, repeat):
+    """Best rate over repeat runs, then the traced peak of one more run."""
+    best = None
+    for _ in range(repeat):
+        if case.setup:
+            case.setup()
+        started = time.perf_counter()
+        units = case.run()
+        elapsed = time.perf_counter() - started
+        if best is None or elapsed < best[1]:
+            best = (units, elapsed)
+    units, elapsed = best
+    if case.unit == "MB/s":
+        units /= 1024 ** 2
+
+    if case.setup:
+        case.setup()
+    tracemalloc.start()
+    case.run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "rate": round(units / elapsed, 1),
+        "unit": case.unit,
+        "seconds": round(elapsed, 4),
+        "peak_mb": round(peak / 1024 ** 2, 2),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print a report, returning the names of cases that regressed."""
+    regressions = []
+    print(f"{'case':<18} {'rate':>14} {'unit':<10} {'best s':>8} {'peak MB':>8} {'baseline':>14} {'change':>8}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        change = ""
+        status = ""
+        if base:
+            ratio = result["rate"] / base["rate"]
+            change = f"{(ratio - 1) * 100:+7.1f}%"
+            if ratio < 1 - threshold:
+                regressions.append(name)
+                status = "  REGRESSION"
+        print(
+            f"{name:<18} {result['rate']:14.1f} {result['unit']:<10} {result['seconds']:8.3f} "
+            f"{result['peak_mb']:8.1f} {base['rate'] if base else float('nan'):14.1f} {change:>8}{status}"
+        )
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--quick", action="store_true", help="smaller fixtures (not comparable with full-size baselines)")
+    ap.add_argument("--repeat", type=int, default=3, help="timed runs per case, the best one counts")
+    ap.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown versus the baseline (0.25 = 25%%)")
+    ap.add_argument("--only", nargs="+", metavar="NAME", help="run only these cases")
+    ap.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    ap.add_argument("--update-baseline", action="store_true", help="store this run's results as the baseline")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="pyterminal-bench-") as tmp, open(os.devnull, "w") as devnull:
+        print("Generating fixtures...")
+        fx = make_fixtures(tmp, 1 if args.quick else 4)
+        cases, metrics = build_cases(fx, devnull)
+        results = {}
+        try:
+            for case in cases:
+                if args.only and case.name not in args.only:
+                    continue
+                results[case.name] = measure(case, args.repeat)
+        finally:
+            metrics.stop()
+    shutil.rmtree(_DATA_DIR, ignore_errors=True)
+
+    scale = "quick" if args.quick else "full"
+    baseline = {}
+    if not os.path.exists(args.baseline):
+        print(f"(no baseline at {args.baseline}, not comparing; record one with --update-baseline)")
+    else:
+        with open(args.baseline) as f:
+            stored = json.load(f)
+        if stored.get("scale") == scale:
+            baseline = stored["results"]
+        else:
+            print(f"(baseline was recorded at {stored.get('scale')} scale, not comparing)")
+    regressions = compare(results, baseline, args.threshold)
+
+    if args.update_baseline:
+        merged = {**baseline, **results}
+        with open(args.baseline, "w") as f:
+            json.dump({"scale": scale, "python": sys.version.split()[0], "results": merged}, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+    elif regressions:
+        print(f"{len(regressions)} case(s) regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
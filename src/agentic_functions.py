@@ -91,6 +91,50 @@ FUNCTION_DEFINITIONS = [
             "required": ["mode"]
         }
     },
+    {
+        "name": "find_files",
+        "description": "Recursively find files and directories under a path in one call (like 'find'). Prefer this over listing directories one by one. Indexed directories (see the 'index' command) are answered from the index.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "path": {"type": "string", "description": "Directory to search. Defaults to the current working directory."},
+                "name": {"type": "string", "description": "Glob the file name must match, e.g. '*.txt'."},
+                "type": {"type": "string", "enum": ["f", "d"], "description": "f = files only, d = directories only."},
+                "size": {"type": "string", "description": "'+N' larger than or '-N' smaller than N bytes; N may end in K, M or G, e.g. '+10M'."},
+                "mtime": {"type": "string", "description": "'-D' modified less than or '+D' more than D days ago, e.g. '-1'."},
+                "max_results": {"type": "integer", "description": "Stop after this many matches. Defaults to 200."}
+            },
+            "required": []
+        }
+    },
+    {
+        "name": "search_files",
+        "description": "Search file contents recursively with a regular expression (like 'grep -r'). Binary files are skipped.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "pattern": {"type": "string", "description": "Regular expression to search for."},
+                "path": {"type": "string", "description": "File or directory to search. Defaults to the current working directory."},
+                "ignore_case": {"type": "boolean", "description": "Match case-insensitively."},
+                "name": {"type": "string", "description": "Only search files whose name matches this glob, e.g. '*.py'."},
+                "max_results": {"type": "integer", "description": "Stop after this many matching lines. Defaults to 200."}
+            },
+            "required": ["pattern"]
+        }
+    },
+    {
+        "name": "disk_usage",
+        "description": "Total disk usage of a directory tree and its heaviest subdirectories (like 'du'). Use this to find out what is taking up space.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "path": {"type": "string", "description": "Directory to measure. Defaults to the current working directory."},
+                "top": {"type": "integer", "description": "How many of the heaviest subdirectories to list. Defaults to 20."},
+                "depth": {"type": "integer", "description": "Only list subdirectories at most this many levels below path, e.g. 1 for direct children."}
+            },
+            "required": []
+        }
+    },
     {
         "name": "remove_path",
         "description": "Remove a file or directory (like 'rm').",
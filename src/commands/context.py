@@ -0,0 +1,62 @@
+from utils.conversation import Conversation
+from utils.options import parse_options
+from utils.output import Column, Output
+
+# Longest prompt text shown per turn
+PROMPT_PREVIEW_CHARS = 60
+
+
+def _preview(text: str) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= PROMPT_PREVIEW_CHARS else text[:PROMPT_PREVIEW_CHARS - 1] + "…"
+
+
+class ContextCommands:
+    def __init__(self, conversation: Conversation):
+        self.conversation = conversation
+
+    def context(self, args, out: Output):
+        """
+        Earlier !ai turns sent along with every new AI prompt of this session.
+        Usage: context | context clear | context budget TOKENS
+        - Each turn shows its tool calls, estimated tokens and whether it was
+          compacted (trimmed: tool results dropped, summary: only prompt and answer)
+        - budget sets the token limit above which old turns are compacted
+        """
+        _, positionals = parse_options("context", args, {})
+        action = positionals[0] if positionals else None
+        conversation = self.conversation
+
+        if action == "clear":
+            conversation.clear()
+            out.info("[green]AI context cleared[/green]")
+        elif action == "budget":
+            if len(positionals) < 2 or not positionals[1].isdigit() or int(positionals[1]) < 1:
+                raise ValueError("context: budget requires a positive number of TOKENS")
+            before, after = conversation.set_budget(int(positionals[1]))
+            out.info(f"[green]Context budget set to {conversation.budget_tokens} tokens[/green]")
+            if after < before:
+                out.info(f"[dim]compacted {before} → {after} tokens[/dim]")
+        elif action is None:
+            turns = list(conversation.turns)
+            if not turns:
+                out.info("[dim]No AI context yet, it builds up with every !ai prompt[/dim]")
+                return
+            columns = [
+                Column("#", "yellow", "right"),
+                Column("Prompt", "cyan"),
+                Column("Tool calls", "white", "right"),
+                Column("Tokens", "green", "right"),
+                Column("State", "magenta"),
+            ]
+            out.table(
+                columns,
+                ((i, _preview(turn.prompt), len(turn.calls), turn.tokens, turn.state) for i, turn in enumerate(turns, 1)),
+                title="AI context",
+            )
+            out.info(
+                f"[dim]{sum(turn.tokens for turn in turns)} of {conversation.budget_tokens} tokens, "
+                f"{conversation.compactions} compactions so far[/dim]"
+            )
+        else:
+            raise ValueError("context: use clear or budget TOKENS, or no argument to show it")
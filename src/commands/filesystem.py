@@ -1,17 +1,192 @@
 import os
+import codecs
+import errno
+import fnmatch
+import heapq
+import itertools
+import re
 import shutil
-from rich.console import Console
-from rich.table import Table
+import time
+from utils.bulk import BulkResult, copy_tree, progress_for, remove_tree, scan_tree
+from utils.disk_usage import DiskUsage
+from utils.follow import POLL_INTERVAL, FollowedFile, Follower
+from utils.fs_index import FileIndex
+from utils.options import parse_options
+from utils.output import Column, Output
+from utils.walker import WalkErrors, parallel_map, walk
+
+# Bytes read (and printed) at a time when streaming file contents
+CAT_CHUNK_SIZE = 64 * 1024
+
+# Bytes handed to the kernel per copy_file_range/sendfile call when concatenating
+COPY_CHUNK_SIZE = 16 * 1024 * 1024
+
+
+def _format_size(size: int) -> str:
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if size < 1024 or unit == "TB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def _format_mtime(mtime: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(mtime))
+
+
+def _format_age(seconds: float) -> str:
+    if seconds < 120:
+        return f"{seconds:.0f}s ago"
+    if seconds < 7200:
+        return f"{seconds / 60:.0f}m ago"
+    if seconds < 172800:
+        return f"{seconds / 3600:.0f}h ago"
+    return f"{seconds / 86400:.0f}d ago"
+
+
+def _parse_size_filter(value: str):
+    """'+10M' -> predicate for sizes above 10 MB, '-4K' -> below 4 KB."""
+    if value[:1] not in "+-" or len(value) < 2:
+        raise ValueError(value)
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    number = value[1:]
+    factor = units.get(number[-1].upper(), 1)
+    if number[-1].upper() in units:
+        number = number[:-1]
+    limit = float(number) * factor
+    return (lambda size: size > limit) if value[0] == "+" else (lambda size: size < limit)
+
+
+def _parse_age_filter(value: str):
+    """'-2' -> predicate for ages below 2 days, '+7' -> above 7 days."""
+    if value[:1] not in "+-" or len(value) < 2:
+        raise ValueError(value)
+    days = float(value[1:])
+    return (lambda age: age > days) if value[0] == "+" else (lambda age: age < days)
+
+
+def _search_file(file_path: str, regex, max_results: int | None = None) -> list:
+    """(path, line number, line) for lines matching regex; [] for binary or unreadable files."""
+    matches = []
+    try:
+        with open(file_path, "rb") as f:
+            if b"\0" in f.read(8192):
+                return matches
+            f.seek(0)
+            for lineno, raw in enumerate(f, 1):
+                line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+                if regex.search(line):
+                    matches.append((file_path, lineno, line))
+                    if max_results is not None and len(matches) >= max_results:
+                        break
+    except OSError:
+        pass
+    return matches
+
+
+def _copy_into(src, dst):
+    """
+    Append everything left in the binary file src to the binary file dst.
+    Uses os.copy_file_range or os.sendfile so data never passes through Python,
+    and falls back to a chunked shutil.copyfileobj where neither applies.
+    """
+    dst.flush()
+    in_fd, out_fd = src.fileno(), dst.fileno()
+
+    if hasattr(os, "copy_file_range"):
+        copied = 0
+        try:
+            while True:
+                n = os.copy_file_range(in_fd, out_fd, COPY_CHUNK_SIZE)
+                if n == 0:
+                    return
+                copied += n
+        except OSError:
+            # e.g. EXDEV/EBADF (O_APPEND targets) or unsupported filesystems,
+            # only safe to fall back if nothing was copied yet
+            if copied:
+                raise
+
+    if hasattr(os, "sendfile"):
+        offset = src.tell()
+        start = offset
+        try:
+            while True:
+                n = os.sendfile(out_fd, in_fd, offset, COPY_CHUNK_SIZE)
+                if n == 0:
+                    return
+                offset += n
+        except OSError:
+            if offset != start:
+                raise
+
+    shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+
+
+def _parse_byte_range(value: str) -> tuple:
+    """Parse an 'A:B' byte range where either bound may be omitted."""
+    start, sep, stop = value.partition(":")
+    if not sep:
+        raise ValueError(value)
+    start = int(start) if start else 0
+    stop = int(stop) if stop else None
+    if start < 0 or (stop is not None and stop < start):
+        raise ValueError(value)
+    return start, stop
+
+
+def _find_nth_newline(block: bytes, n: int) -> int | None:
+    """Index of the n-th newline in block, or None if it has fewer."""
+    if n == 0:
+        return -1
+    idx = -1
+    for _ in range(n):
+        idx = block.find(b"\n", idx + 1)
+        if idx == -1:
+            return None
+    return idx
+
+
+def _tail_offset(f, lines: int) -> int:
+    """Offset where the last `lines` lines of a binary file start, reading backwards in chunks."""
+    end = f.seek(0, os.SEEK_END)
+    if lines == 0 or end == 0:
+        return end
+    # A trailing newline ends the last line rather than starting a new one
+    f.seek(end - 1)
+    search_end = end - 1 if f.read(1) == b"\n" else end
+    pos = search_end
+    while pos > 0:
+        step = min(CAT_CHUNK_SIZE, pos)
+        pos -= step
+        f.seek(pos)
+        block = f.read(step)
+        idx = len(block)
+        while True:
+            idx = block.rfind(b"\n", 0, idx)
+            if idx == -1:
+                break
+            lines -= 1
+            if lines == 0:
+                return pos + idx + 1
+    return 0
+
 
 class FileSystemCommands:
-    def __init__(self, console: Console):
-        self.console = console
+    def __init__(self, file_index: FileIndex | None = None, change_process_dir: bool = True):
+        """
+        - file_index: an index shared with other sessions (a new one by default)
+        - change_process_dir: cd also changes the process working directory. Off for
+          daemon sessions, which each keep their own directory inside one process
+        """
         self.current_dir = os.getcwd()
+        self.file_index = file_index if file_index is not None else FileIndex()
+        self.disk_usage = DiskUsage()
+        self.change_process_dir = change_process_dir
 
     def _resolve_path(self, path: str) -> str:
         return os.path.abspath(os.path.join(self.current_dir, path))
     
-    def cat(self, args, content: str | None = None):
+    def cat(self, args, out: Output, content: str | None = None):
         """
         Basic cat command.
         - Display single/multiple files
@@ -20,29 +195,198 @@ class FileSystemCommands:
         - >> append
         - Interactive mode for creating new files
         - Optional content parameter for direct write/append
+        - --window BYTES: head and tail of a large file, BYTES in total; the rest is never read
         """
         if not args and content is None:
-            self.console.print("[red]cat: missing arguments[/red]")
+            out.error("[red]cat: missing arguments[/red]")
             return
 
         # Detect redirection (> or >>)
         if ">" in args or ">>" in args:
-            self._handle_redirection(args, content)
+            self._handle_redirection(args, out, content)
             return
 
-        # No redirection: just display files
-        for file in args:
+        options, files = parse_options(
+            "cat", args, {"--head": int, "--tail": int, "--bytes": _parse_byte_range, "--window": int}
+        )
+        if len(options) > 1:
+            raise ValueError("cat: --head, --tail, --bytes and --window cannot be combined")
+        if options.get("--head", 0) < 0 or options.get("--tail", 0) < 0:
+            raise ValueError("cat: line counts must not be negative")
+        if options.get("--window", 1) < 1:
+            raise ValueError("cat: --window must be positive")
+
+        # No redirection: stream files chunk by chunk, file content is never parsed as markup
+        for file in files:
             file_path = self._resolve_path(file)
             if not os.path.exists(file_path):
-                self.console.print(f"[red]cat: {file} does not exist[/red]")
+                out.error(f"[red]cat: {file} does not exist[/red]")
                 continue
             try:
-                with open(file_path, "r") as f:
-                    self.console.print(f.read(), end="")
+                if "--window" in options:
+                    chunks = self._iter_window(file_path, options["--window"])
+                else:
+                    chunks = self._iter_file(
+                        file_path,
+                        head=options.get("--head"),
+                        tail=options.get("--tail"),
+                        byte_range=options.get("--bytes"),
+                    )
+                out.text(chunks)
             except Exception as e:
-                self.console.print(f"[red]Error reading {file}: {e}[/red]")
+                out.error(f"[red]Error reading {file}: {e}[/red]")
+
+    def tail(self, args, out: Output):
+        """
+        Last lines of files, optionally following them as they grow.
+        Usage: tail FILE ... [-n N] [-f] [--highlight REGEX] [--only] [--interval S]
+        - -n: how many lines to show first (default 10)
+        - -f: keep printing appended lines until Ctrl+C. Only new bytes are read;
+          waiting uses inotify where available (no CPU while idle), otherwise every
+          file is checked each --interval seconds. Rotated or truncated files are
+          followed from their new start
+        - --highlight: colour matches of REGEX, --only: show matching lines only
+        """
+        options, files = parse_options(
+            "tail", args,
+            {"-n": int, "-f": bool, "--highlight": str, "--only": bool, "--interval": float},
+        )
+        count = options.get("-n", 10)
+        interval = options.get("--interval", POLL_INTERVAL)
+        if not files:
+            raise ValueError("tail: missing FILE")
+        if count < 0 or interval <= 0:
+            raise ValueError("tail: -n must not be negative and --interval must be positive")
+        try:
+            regex = re.compile(options["--highlight"]) if "--highlight" in options else None
+        except re.error as e:
+            raise ValueError(f"tail: invalid pattern: {e}")
+        if options.get("--only") and regex is None:
+            raise ValueError("tail: --only needs --highlight REGEX")
 
-    def _handle_redirection(self, args, content: str | None = None):
+        followed = []
+        for file in dict.fromkeys(files):
+            entry = FollowedFile(self._resolve_path(file))
+            try:
+                entry.open()
+                entry.pos = entry.file.seek(_tail_offset(entry.file, count))
+            except OSError as e:
+                out.error(f"[red]tail: cannot open {file}:[/red] {e.strerror or e}")
+                entry.close()
+                continue
+            followed.append(entry)
+        if not followed:
+            return
+
+        only = options.get("--only", False)
+        follow = options.get("-f", False)
+        headers = len(followed) > 1
+        follower = Follower(followed, interval) if follow else None
+
+        def batches():
+            """(file to name in a header or None, lines) as they become available."""
+            last = None
+            for entry in followed:
+                lines, _ = entry.check()
+                if not follow:
+                    lines += entry.flush()
+                if lines or not follow:
+                    yield (entry if headers else None), lines
+                    last = entry
+            if follower is None:
+                return
+            out.info(f"[dim]Following {len(followed)} file(s) with {follower.backend}, Ctrl+C to stop[/dim]")
+            for entry, lines, note in follower.changes():
+                if note:
+                    out.info(f"[yellow]tail: {entry.path} was {note}, following it from the start[/yellow]")
+                yield (entry if headers and entry is not last else None), lines
+                last = entry
+
+        def shown(lines):
+            return [line for line in lines if regex.search(line)] if only else lines
+
+        console = getattr(out, "console", None) if out.interactive and regex is not None else None
+        try:
+            if console is not None:
+                from rich.markup import escape
+                from rich.text import Text
+
+                for entry, lines in batches():
+                    if entry is not None:
+                        console.print(f"[bold cyan]==> {escape(entry.path)} <==[/bold cyan]")
+                    lines = shown(lines)
+                    if lines:
+                        text = Text("\n".join(lines))
+                        text.highlight_regex(regex, "bold black on yellow")
+                        console.print(text, soft_wrap=True, highlight=False)
+            else:
+                out.text(
+                    (f"==> {entry.path} <==\n" if entry is not None else "")
+                    + "".join(line + "\n" for line in shown(lines))
+                    for entry, lines in batches()
+                )
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if follower is not None:
+                follower.close()
+            for entry in followed:
+                entry.close()
+
+    def _iter_file(self, file_path: str, head: int | None = None, tail: int | None = None,
+                   byte_range: tuple | None = None):
+        """
+        Yield decoded text chunks of at most CAT_CHUNK_SIZE bytes.
+        - head: only the first N lines
+        - tail: only the last N lines, found by seeking backwards from the end
+        - byte_range: only the (start, stop) byte range, stop may be None for end of file
+        """
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        with open(file_path, "rb") as f:
+            start, stop = byte_range if byte_range else (0, None)
+            if tail is not None:
+                start = _tail_offset(f, tail)
+            f.seek(start)
+            remaining = None if stop is None else max(stop - start, 0)
+            lines_left = head
+            while remaining is None or remaining > 0:
+                block = f.read(CAT_CHUNK_SIZE if remaining is None else min(CAT_CHUNK_SIZE, remaining))
+                if not block:
+                    break
+                if remaining is not None:
+                    remaining -= len(block)
+                if lines_left is not None:
+                    cut = _find_nth_newline(block, lines_left)
+                    if cut is not None:
+                        yield decoder.decode(block[:cut + 1], final=True)
+                        return
+                    lines_left -= block.count(b"\n")
+                yield decoder.decode(block)
+            tail_text = decoder.decode(b"", final=True)
+            if tail_text:
+                yield tail_text
+
+    def _iter_window(self, file_path: str, window: int):
+        """
+        Yield the head (two thirds) and tail of a file, window bytes in total, with an
+        omission marker between them. Smaller files are yielded whole.
+        """
+        with open(file_path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size <= window:
+                yield from self._iter_file(file_path)
+                return
+            head = f.read(window * 2 // 3)
+            f.seek(size - (window - len(head)))
+            tail = f.read(window - len(head))
+        # Whole lines only, unless a single line is longer than its half of the window
+        head = head[:head.rfind(b"\n") + 1] or head
+        tail = tail[tail.find(b"\n") + 1:] or tail
+        yield head.decode("utf-8", errors="replace")
+        yield f"[... {size - len(head) - len(tail)} bytes omitted ...]\n"
+        yield tail.decode("utf-8", errors="replace")
+
+    def _handle_redirection(self, args, out: Output, content: str | None = None):
         """Handle cat > file.txt, cat >> file.txt, interactive mode, and direct content writing."""
         try:
             if ">>" in args:
@@ -56,7 +400,7 @@ class FileSystemCommands:
                 target = args[idx + 1]
                 mode = "w"
         except IndexError:
-            self.console.print("[red]cat: invalid redirection usage[/red]")
+            out.error("[red]cat: invalid redirection usage[/red]")
             return
 
         target_path = self._resolve_path(target)
@@ -67,14 +411,17 @@ class FileSystemCommands:
                 with open(target_path, mode) as f:
                     f.write(content + "\n")
                 action = "appended to" if mode == "a" else "written to"
-                self.console.print(f"[green]cat: content {action} {target}[/green]")
+                out.info(f"[green]cat: content {action} {target}[/green]")
             except Exception as e:
-                self.console.print(f"[red]Error writing to {target}: {e}[/red]")
+                out.error(f"[red]Error writing to {target}: {e}[/red]")
             return
 
         # Interactive mode: no files, write mode
         if not files and mode == "w":
-            self.console.print(
+            if not out.interactive:
+                out.error(f"[red]cat: no content given for {target}[/red]")
+                return
+            out.info(
                 f"[bold yellow]Enter content for {target} (Ctrl+D or Ctrl+Z+Enter to save):[/bold yellow]"
             )
             lines = []
@@ -89,101 +436,593 @@ class FileSystemCommands:
                 cleaned_lines = [l.replace("\x1a", "").strip() for l in lines if l.strip() != ""]
                 with open(target_path, "w") as f:
                     f.write("\n".join(cleaned_lines) + "\n")
-                self.console.print(f"\n[green]cat: created {target}[/green]")
+                out.info(f"\n[green]cat: created {target}[/green]")
             except Exception as e:
-                self.console.print(f"[red]Error writing to {target}: {e}[/red]")
+                out.error(f"[red]Error writing to {target}: {e}[/red]")
             return
 
-        # Read from source files and write to target
-        output_data = []
+        # Stream every source into the target, letting the kernel copy the bytes
+        sources = []
         for file in files:
             file_path = self._resolve_path(file)
             if not os.path.exists(file_path):
-                self.console.print(f"[red]cat: {file} does not exist[/red]")
+                out.error(f"[red]cat: {file} does not exist[/red]")
                 continue
-            try:
-                with open(file_path, "r") as f:
-                    output_data.append(f.read())
-            except Exception as e:
-                self.console.print(f"[red]Error reading {file}: {e}[/red]")
+            if os.path.exists(target_path) and os.path.samefile(file_path, target_path):
+                out.error(f"[red]cat: {file}: input file is output file[/red]")
+                continue
+            sources.append((file, file_path))
+        if not sources:
+            # Every source was reported above; opening the target would only truncate it
+            return
 
         try:
-            with open(target_path, mode) as f:
-                f.write("\n".join(output_data))
-            self.console.print(f"[green]cat: written to {target}[/green]")
+            with open(target_path, mode + "b") as dst:
+                for file, file_path in sources:
+                    try:
+                        with open(file_path, "rb") as src:
+                            _copy_into(src, dst)
+                    except OSError as e:
+                        out.error(f"[red]Error reading {file}: {e}[/red]")
+            out.info(f"[green]cat: written to {target}[/green]")
         except Exception as e:
-            self.console.print(f"[red]Error writing to {target}: {e}[/red]")
+            out.error(f"[red]Error writing to {target}: {e}[/red]")
+
+    def ls(self, args, out: Output):
+        """
+        List a directory.
+        - Entries are streamed from os.scandir and printed in chunks as they arrive
+        - --limit N and --page P show the P-th page of N entries
+        - --sort name|size|mtime sorts using the stat data scandir already fetched
+          (size and mtime list the largest/newest first), --reverse flips the order
+        - Directories under an indexed root are listed from the index when the
+          directory hasn't changed since it was indexed
+        """
+        options, paths = parse_options(
+            "ls", args, {"--limit": int, "--page": int, "--sort": str, "--reverse": bool}
+        )
+        path = self.current_dir if not paths else self._resolve_path(paths[0])
+        sort_by = options.get("--sort")
+        limit = options.get("--limit")
+        page = options.get("--page", 1)
+        if sort_by not in (None, "name", "size", "mtime"):
+            raise ValueError(f"ls: cannot sort by '{sort_by}' (use name, size or mtime)")
+        if (limit is not None and limit < 1) or page < 1:
+            raise ValueError("ls: --limit and --page must be positive")
+        if "--page" in options and limit is None:
+            raise ValueError("ls: --page requires --limit")
+
+        if not os.path.isdir(path):
+            out.error(f"[red]No such directory:[/red] {path}")
+            return
+
+        with_stat = sort_by in ("size", "mtime")
+        start = (page - 1) * limit if limit else 0
+        stop = start + limit if limit else None
 
+        columns = [Column(os.path.basename(path) or path, "cyan")]
+        if with_stat:
+            columns += [
+                Column("Size", "green", "right", _format_size),
+                Column("Modified", "yellow", format=_format_mtime),
+            ]
 
-    def ls(self, args):
-        path = self.current_dir if not args else self._resolve_path(args[0])
         try:
-            items = os.listdir(path)
-            table = Table()
-            table.add_column(f"{os.path.basename(path)}", style="cyan")
-            for item in items:
-                table.add_row(item)
-            self.console.print(table)
-        except FileNotFoundError:
-            self.console.print(f"[red]No such directory:[/red] {path}")
-
-    def pwd(self, args):
-        self.console.print(f"[bold yellow]{self.current_dir}[/bold yellow]")
-
-    def cd(self, args):
+            entries = self.file_index.listing(path)
+            if entries is None:
+                entries = self._scan_dir(path, with_stat)
+            if sort_by:
+                # Sorting only keeps plain tuples around, and with --limit only the
+                # entries up to the requested page
+                key = {"name": lambda e: e[0], "size": lambda e: e[1], "mtime": lambda e: e[2]}[sort_by]
+                descending = (sort_by != "name") != options.get("--reverse", False)
+                if stop is not None:
+                    pick = heapq.nlargest if descending else heapq.nsmallest
+                    entries = pick(stop, entries, key=key)[start:]
+                else:
+                    entries = sorted(entries, key=key, reverse=descending)
+            elif limit:
+                entries = itertools.islice(entries, start, stop)
+            rows = (
+                (name + "/" if is_dir else name, size, mtime) if with_stat else (name + "/" if is_dir else name,)
+                for name, size, mtime, is_dir in entries
+            )
+            shown = out.table(columns, rows)
+        except PermissionError:
+            out.error(f"[red]ls: permission denied:[/red] {path}")
+            return
+
+        if limit:
+            out.info(f"[dim]Page {page}: {shown} entries (limit {limit})[/dim]")
+
+    def _scan_dir(self, path: str, with_stat: bool = False):
+        """
+        Yield (name, size, mtime, is_dir) tuples straight from os.scandir.
+        Symlinks are not followed, as in the index: a link to a directory is not a directory.
+        """
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    if with_stat:
+                        st = entry.stat(follow_symlinks=False)
+                        yield entry.name, st.st_size, st.st_mtime, is_dir
+                    else:
+                        yield entry.name, 0, 0.0, is_dir
+                except OSError:
+                    # Entry vanished or cannot be stat'ed between readdir and stat
+                    continue
+
+    def pwd(self, args, out: Output):
+        out.info(f"[bold yellow]{self.current_dir}[/bold yellow]")
+
+    def cd(self, args, out: Output):
         if not args:
-            self.console.print("[red]cd: missing argument[/red]")
+            out.error("[red]cd: missing argument[/red]")
             return
         new_path = self._resolve_path(args[0])
         if os.path.isdir(new_path):
             self.current_dir = new_path
-            os.chdir(new_path)
+            if self.change_process_dir:
+                os.chdir(new_path)
         else:
-            self.console.print(f"[red]cd: no such directory:[/red] {args[0]}")
+            out.error(f"[red]cd: no such directory:[/red] {args[0]}")
 
-    def mkdir(self, args):
+    def mkdir(self, args, out: Output):
         if not args:
-            self.console.print("[red]mkdir: missing directory name[/red]")
+            out.error("[red]mkdir: missing directory name[/red]")
             return
         path = self._resolve_path(args[0])
         try:
             os.makedirs(path, exist_ok=False)
-            self.console.print(f"[green]Directory created:[/green] {path}")
+            out.info(f"[green]Directory created:[/green] {path}")
         except FileExistsError:
-            self.console.print(f"[red]mkdir: cannot create directory '{args[0]}': File exists[/red]")
+            out.error(f"[red]mkdir: cannot create directory '{args[0]}': File exists[/red]")
     
-    def mv(self, args):
+    def mv(self, args, out: Output):
         """
         Move or rename a file/directory.
-        Usage: mv source_path destination_path
+        Usage: mv source_path destination_path [--dry-run]
+        - Within a filesystem this is a rename
+        - Across filesystems directories are copied with a worker pool and the source is
+          only deleted once every file was copied; Ctrl+C leaves the source in place
         """
-        if len(args) < 2:
-            self.console.print("[red]mv: missing source or destination[/red]")
+        options, paths = parse_options("mv", args, {"--dry-run": bool})
+        if len(paths) < 2:
+            out.error("[red]mv: missing source or destination[/red]")
             return
 
-        src = self._resolve_path(args[0])
-        dest = self._resolve_path(args[1])
+        src = self._resolve_path(paths[0])
+        dest = self._resolve_path(paths[1])
 
-        if not os.path.exists(src):
-            self.console.print(f"[red]mv: source does not exist:[/red] {args[0]}")
+        if not os.path.lexists(src):
+            out.error(f"[red]mv: source does not exist:[/red] {paths[0]}")
             return
+        if os.path.isdir(dest):
+            dest = os.path.join(dest, os.path.basename(src))
+        dry_run = options.get("--dry-run", False)
 
         try:
-            shutil.move(src, dest)
-            self.console.print(f"[green]Moved/Renamed:[/green] {src} → {dest}")
-        except Exception as e:
-            self.console.print(f"[red]mv: error moving '{args[0]}' to '{args[1]}': {e}[/red]")
+            if dry_run and os.stat(src).st_dev == os.stat(os.path.dirname(dest)).st_dev:
+                out.info(f"[yellow]Would rename:[/yellow] {src} → {dest}")
+                return
+            if not dry_run:
+                os.rename(src, dest)
+                out.info(f"[green]Moved/Renamed:[/green] {src} → {dest}")
+                return
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                out.error(f"[red]mv: error moving '{paths[0]}' to '{paths[1]}': {e}[/red]")
+                return
 
-    def rm(self, args):
-        if not args:
-            self.console.print("[red]rm: missing file/directory name[/red]")
+        # Different filesystem: copy, then delete the source
+        if not os.path.isdir(src) or os.path.islink(src):
+            if dry_run:
+                out.info(f"[yellow]Would copy across filesystems, then delete:[/yellow] {src} → {dest}")
+                return
+            try:
+                shutil.move(src, dest)
+                out.info(f"[green]Moved/Renamed:[/green] {src} → {dest}")
+            except OSError as e:
+                out.error(f"[red]mv: error moving '{paths[0]}' to '{paths[1]}': {e}[/red]")
             return
-        path = self._resolve_path(args[0])
-        if os.path.isfile(path):
+        dirs, files = scan_tree(src)
+        result = BulkResult(files, dirs)
+        if dry_run:
+            out.info(
+                f"[yellow]Would copy across filesystems, then delete:[/yellow] {src} → {dest} "
+                f"({result.total_files} files, {result.total_dirs} directories, {_format_size(result.total_bytes)})"
+            )
+            return
+        try:
+            with progress_for(out, "Copying", result) as progress:
+                copy_tree(src, dest, dirs, files, result, progress)
+        except OSError as e:
+            # Includes FileExistsError when dest already (partly) exists
+            out.error(f"[red]mv: error moving '{paths[0]}' to '{paths[1]}': {e}[/red]")
+            out.error(f"[red]mv: source left in place:[/red] {src}")
+            return
+        if result.cancelled or result.errors:
+            self._bulk_report(out, "mv", "Copied", dest, result)
+            out.error(f"[red]mv: source left in place:[/red] {src}")
+            return
+        with progress_for(out, "Removing source", result) as progress:
+            removed = remove_tree(src, dirs, files, BulkResult(files, dirs), progress)
+        if removed.cancelled or removed.errors:
+            self._bulk_report(out, "mv", "Removed from source", src, removed)
+            return
+        out.info(
+            f"[green]Moved/Renamed:[/green] {src} → {dest} ({result.files} files, "
+            f"{_format_size(result.bytes)} in {result.elapsed:.2f}s)"
+        )
+
+    def cp(self, args, out: Output):
+        """
+        Copy a file, or a directory with -r.
+        Usage: cp [-r] source_path destination_path [--dry-run]
+        - Directory trees are copied with a worker pool, files concurrently
+        - --dry-run only reports what would be copied
+        - Ctrl+C stops after the files being copied (none is left half-written)
+        """
+        options, paths = parse_options("cp", args, {"-r": bool, "-R": bool, "--dry-run": bool})
+        if len(paths) < 2:
+            out.error("[red]cp: missing source or destination[/red]")
+            return
+        src = self._resolve_path(paths[0])
+        dest = self._resolve_path(paths[1])
+        dry_run = options.get("--dry-run", False)
+        if not os.path.lexists(src):
+            out.error(f"[red]cp: source does not exist:[/red] {paths[0]}")
+            return
+        if os.path.isdir(dest):
+            dest = os.path.join(dest, os.path.basename(src))
+
+        if not os.path.isdir(src):
+            if dry_run:
+                out.info(f"[yellow]Would copy:[/yellow] {src} → {dest}")
+                return
+            try:
+                shutil.copy2(src, dest)
+                out.info(f"[green]Copied:[/green] {src} → {dest}")
+            except OSError as e:
+                out.error(f"[red]cp: error copying '{paths[0]}' to '{paths[1]}': {e}[/red]")
+            return
+
+        if not (options.get("-r") or options.get("-R")):
+            out.error(f"[red]cp: -r not specified; omitting directory '{paths[0]}'[/red]")
+            return
+        if os.path.lexists(dest):
+            out.error(f"[red]cp: destination already exists:[/red] {dest}")
+            return
+        if (dest + os.sep).startswith(src + os.sep):
+            out.error(f"[red]cp: cannot copy '{paths[0]}' into itself[/red]")
+            return
+        dirs, files = scan_tree(src)
+        result = BulkResult(files, dirs)
+        if dry_run:
+            out.info(
+                f"[yellow]Would copy:[/yellow] {src} → {dest} ({result.total_files} files, "
+                f"{result.total_dirs} directories, {_format_size(result.total_bytes)})"
+            )
+            return
+        try:
+            with progress_for(out, "Copying", result) as progress:
+                copy_tree(src, dest, dirs, files, result, progress)
+        except OSError as e:
+            out.error(f"[red]cp: error copying '{paths[0]}' to '{paths[1]}': {e}[/red]")
+            return
+        self._bulk_report(out, "cp", "Copied", dest, result)
+
+    def rm(self, args, out: Output):
+        """
+        Remove a file or directory.
+        Usage: rm [-r] path [--dry-run]
+        - Directories are always removed recursively (-r is accepted for familiarity):
+          files are deleted concurrently, then directories deepest first
+        - --dry-run only reports what would be removed
+        - Ctrl+C stops after the files being deleted, with a summary
+        """
+        options, paths = parse_options("rm", args, {"-r": bool, "-R": bool, "-rf": bool, "--dry-run": bool})
+        if not paths:
+            out.error("[red]rm: missing file/directory name[/red]")
+            return
+        path = self._resolve_path(paths[0])
+        dry_run = options.get("--dry-run", False)
+        if os.path.islink(path) or os.path.isfile(path):
+            if dry_run:
+                out.info(f"[yellow]Would remove file:[/yellow] {path}")
+                return
             os.remove(path)
-            self.console.print(f"[green]Removed file:[/green] {path}")
+            out.info(f"[green]Removed file:[/green] {path}")
         elif os.path.isdir(path):
-            shutil.rmtree(path)
-            self.console.print(f"[green]Removed directory:[/green] {path}")
+            dirs, files = scan_tree(path)
+            result = BulkResult(files, dirs)
+            if dry_run:
+                out.info(
+                    f"[yellow]Would remove directory:[/yellow] {path} ({result.total_files} files, "
+                    f"{result.total_dirs} directories, {_format_size(result.total_bytes)})"
+                )
+                return
+            try:
+                with progress_for(out, "Removing", result) as progress:
+                    remove_tree(path, dirs, files, result, progress)
+            except OSError as e:
+                result.errors.append(e)
+            if result.cancelled or result.errors:
+                self._bulk_report(out, "rm", "Removed", path, result)
+            else:
+                out.info(f"[green]Removed directory:[/green] {path}")
         else:
-            self.console.print(f"[red]rm: cannot remove '{args[0]}': No such file or directory[/red]")
+            out.error(f"[red]rm: cannot remove '{paths[0]}': No such file or directory[/red]")
+
+    def _bulk_report(self, out: Output, cmd: str, verb: str, path: str, result: BulkResult):
+        """Summary of a bulk copy/remove, including what was done before a cancel or failure."""
+        done = (
+            f"{result.files} of {result.total_files} files, "
+            f"{_format_size(result.bytes)} of {_format_size(result.total_bytes)} in {result.elapsed:.2f}s"
+        )
+        if result.cancelled:
+            out.error(f"[yellow]{cmd}: cancelled.[/yellow] {verb} {done}: {path}")
+        elif result.errors:
+            out.error(f"[red]{cmd}: {len(result.errors)} errors ({result.errors[-1]}).[/red] {verb} {done}: {path}")
+        else:
+            rate = result.files / result.elapsed if result.elapsed else 0.0
+            out.info(f"[green]{verb}:[/green] {path} ({done}, {rate:.0f} files/s)")
+
+    def find(self, args, out: Output):
+        """
+        Recursively find files and directories, scanning directories concurrently.
+        Usage: find [PATH] [--name GLOB] [--type f|d] [--size +N|-N] [--mtime +D|-D] [--max-results N]
+        - --size: larger (+) or smaller (-) than N bytes, N may end in K, M or G
+        - --mtime: modified more (+) or less (-) than D days ago
+        - Under an indexed root the searched part of the index is refreshed (one stat
+          per directory) and queried instead of walking, --no-index forces a walk
+        Results are streamed as they are found, in no particular order.
+        """
+        options, paths = parse_options(
+            "find", args,
+            {"--name": str, "--type": str, "--size": _parse_size_filter, "--mtime": _parse_age_filter,
+             "--max-results": int, "--no-index": bool},
+        )
+        root = self.current_dir if not paths else self._resolve_path(paths[0])
+        kind = options.get("--type")
+        if kind not in (None, "f", "d"):
+            raise ValueError("find: --type must be f or d")
+        max_results = options.get("--max-results")
+        if max_results is not None and max_results < 1:
+            raise ValueError("find: --max-results must be positive")
+        if not os.path.isdir(root):
+            out.error(f"[red]find: no such directory:[/red] {root}")
+            return
+
+        name = options.get("--name")
+        size_filter = options.get("--size")
+        age_filter = options.get("--mtime")
+        now = time.time()
+        errors = WalkErrors()
+
+        def walked():
+            for entry in walk(root, errors=errors):
+                try:
+                    if name and not fnmatch.fnmatch(entry.name, name):
+                        continue
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    if (kind == "f" and is_dir) or (kind == "d" and not is_dir):
+                        continue
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                yield entry.path, st.st_size, st.st_mtime, is_dir
+
+        def matches(found):
+            for path, size, mtime, is_dir in found:
+                if size_filter and not size_filter(size):
+                    continue
+                if age_filter and not age_filter((now - mtime) / 86400):
+                    continue
+                path = os.path.relpath(path, root)
+                yield (path + "/" if is_dir else path, None if is_dir else size, mtime)
+
+        indexed_root = None if options.get("--no-index") else self.file_index.root_for(root)
+        if indexed_root:
+            checked, rescanned = self.file_index.refresh(root)
+            rows = matches(self.file_index.search(root, name, kind))
+        else:
+            rows = matches(walked())
+        if max_results is not None:
+            rows = itertools.islice(rows, max_results)
+        columns = [
+            Column("Path", "cyan"),
+            Column("Size", "green", "right", _format_size),
+            Column("Modified", "yellow", format=_format_mtime),
+        ]
+        shown = out.table(columns, rows, title=f"find: {root}")
+        out.info(f"[dim]{shown} matches[/dim]")
+        if indexed_root:
+            out.info(
+                f"[dim]Answered from the index of {indexed_root} "
+                f"({rescanned} of {checked} directories rescanned)[/dim]"
+            )
+        if errors.count:
+            out.info(f"[yellow]find: {errors.count} directories could not be read ({errors.last})[/yellow]")
+
+    def grep(self, args, out: Output):
+        """
+        Search file contents with a regular expression.
+        Usage: grep PATTERN [PATH ...] [-i] [--name GLOB] [--max-results N]
+        - Directories are walked recursively (or listed from the index when indexed)
+          and files are searched concurrently
+        - Binary files (a NUL byte in the first block) are skipped
+        - Stops as soon as --max-results matching lines were found
+        """
+        options, positionals = parse_options(
+            "grep", args, {"-i": bool, "--name": str, "--max-results": int}
+        )
+        if not positionals:
+            raise ValueError("grep: missing pattern")
+        pattern, *paths = positionals
+        try:
+            regex = re.compile(pattern, re.IGNORECASE if options.get("-i") else 0)
+        except re.error as e:
+            raise ValueError(f"grep: invalid pattern: {e}")
+        max_results = options.get("--max-results")
+        if max_results is not None and max_results < 1:
+            raise ValueError("grep: --max-results must be positive")
+
+        name = options.get("--name")
+        errors = WalkErrors()
+        base = self.current_dir
+
+        def files():
+            for path in paths or ["."]:
+                full = self._resolve_path(path)
+                if os.path.isfile(full):
+                    yield full
+                elif os.path.isdir(full) and self.file_index.root_for(full):
+                    self.file_index.refresh(full)
+                    for file_path, _, _, _ in self.file_index.search(full, name, "f"):
+                        yield file_path
+                elif os.path.isdir(full):
+                    for entry in walk(full, errors=errors):
+                        try:
+                            if entry.is_file(follow_symlinks=False) and (not name or fnmatch.fnmatch(entry.name, name)):
+                                yield entry.path
+                        except OSError:
+                            continue
+                else:
+                    out.error(f"[red]grep: {path}: No such file or directory[/red]")
+
+        def search(file_path):
+            return _search_file(file_path, regex, max_results)
+
+        def rows():
+            for matches in parallel_map(search, files()):
+                for file_path, lineno, line in matches:
+                    yield os.path.relpath(file_path, base), lineno, line
+
+        results = rows()
+        if max_results is not None:
+            results = itertools.islice(results, max_results)
+        columns = [Column("File", "cyan"), Column("Line", "yellow", "right"), Column("Text", "white")]
+        shown = out.table(columns, results, title=f"grep: {pattern}")
+        out.info(f"[dim]{shown} matching lines[/dim]")
+        if errors.count:
+            out.info(f"[yellow]grep: {errors.count} directories could not be read ({errors.last})[/yellow]")
+
+    def du(self, args, out: Output):
+        """
+        Disk usage of a directory tree and its heaviest subtrees.
+        Usage: du [PATH] [--top N] [--depth D] [--apparent] [--no-cache]
+        - --top: how many subtrees to list (default 20), heaviest first
+        - --depth: only list subtrees at most D levels below PATH
+        - --apparent: file sizes instead of allocated disk space
+        - Directories unchanged (same mtime) since the last du are not read again,
+          --no-cache re-reads everything
+        Hard links are counted once, symlinks are not followed.
+        """
+        options, paths = parse_options(
+            "du", args, {"--top": int, "--depth": int, "--apparent": bool, "--no-cache": bool}
+        )
+        if len(paths) > 1:
+            raise ValueError("du: takes a single PATH")
+        top = options.get("--top", 20)
+        depth = options.get("--depth")
+        if top < 0 or (depth is not None and depth < 1):
+            raise ValueError("du: --top must not be negative and --depth must be positive")
+        root = self.current_dir if not paths else self._resolve_path(paths[0])
+        if not os.path.isdir(root):
+            out.error(f"[red]du: no such directory:[/red] {root}")
+            return
+
+        apparent = options.get("--apparent", False)
+        errors = WalkErrors()
+        started = time.perf_counter()
+        subtrees, stats = self.disk_usage.scan(root, use_cache=not options.get("--no-cache"), errors=errors)
+        elapsed = time.perf_counter() - started
+        if not subtrees:
+            out.error(f"[red]du: cannot read[/red] {root} ({errors.last})")
+            return
+
+        def weight(usage):
+            return usage.size if apparent else usage.disk
+
+        total = next(usage for usage in subtrees if usage.depth == 0)
+        listed = sorted(u for u in subtrees if u.depth > 0 and (depth is None or u.depth <= depth))
+        rows = (
+            (os.path.relpath(u.path, root) + "/", weight(u), u.files,
+             weight(u) / weight(total) * 100 if weight(total) else 0.0)
+            for u in heapq.nlargest(top, listed, key=weight)
+        )
+        columns = [
+            Column("Directory", "cyan"),
+            Column("Size", "green", "right", _format_size),
+            Column("Files", "white", "right"),
+            Column("Share", "yellow", "right", lambda share: f"{share:.1f}%"),
+        ]
+        out.table(columns, rows, title=f"du: {root}")
+        notes = [f"{elapsed:.2f}s", f"{stats['cached']} directories unchanged since the last du"]
+        if stats["hardlinks"]:
+            notes.append(f"{stats['hardlinks']} extra hard links not counted")
+        out.info(
+            f"[bold]{_format_size(weight(total))}[/bold] {'apparent size' if apparent else 'on disk'} in "
+            f"{total.files} files, {stats['dirs']} directories [dim]({', '.join(notes)})[/dim]"
+        )
+        if errors.count:
+            out.info(f"[yellow]du: {errors.count} directories could not be read ({errors.last})[/yellow]")
+
+    def index(self, args, out: Output):
+        """
+        Manage the on-disk metadata index used by ls, find and grep.
+        Usage: index add PATH | index remove PATH | index rebuild [PATH] | index refresh [PATH] | index status
+        - add indexes a new root, rebuild re-reads it from scratch
+        - refresh only rescans directories whose mtime changed since the last refresh
+        - status reports size, age and how many directories changed since (stale)
+        """
+        if not args or args[0] not in ("add", "remove", "rebuild", "refresh", "status"):
+            raise ValueError("index: use add, remove, rebuild, refresh or status")
+        action, rest = args[0], args[1:]
+        roots = self.file_index.roots()
+
+        if action == "status" and not roots:
+            out.info("[dim]No indexed roots, add one with: index add PATH[/dim]")
+            return
+        if action == "status":
+            rows = (
+                (root, entries, dirs, _format_age(age), stale)
+                for root, entries, dirs, age, stale in self.file_index.status()
+            )
+            columns = [
+                Column("Root", "cyan"),
+                Column("Entries", "green", "right"),
+                Column("Directories", "green", "right"),
+                Column("Refreshed", "yellow"),
+                Column("Stale dirs", "red", "right"),
+            ]
+            out.table(columns, rows, title="File index")
+            return
+
+        if action in ("add", "remove") and not rest:
+            raise ValueError(f"index: {action} requires a PATH")
+        targets = [self._resolve_path(p) for p in rest] or list(roots)
+        if not targets:
+            out.info("[dim]No indexed roots, add one with: index add PATH[/dim]")
+            return
+        for root in targets:
+            if action == "add" and not os.path.isdir(root):
+                out.error(f"[red]index: no such directory:[/red] {root}")
+            elif action != "add" and root not in roots:
+                out.error(f"[red]index: not an indexed root:[/red] {root}")
+            elif action == "remove":
+                self.file_index.remove(root)
+                out.info(f"[green]Removed from index:[/green] {root}")
+            elif action == "refresh":
+                start = time.perf_counter()
+                checked, rescanned = self.file_index.refresh(root)
+                out.info(
+                    f"[green]Refreshed[/green] {root}: {rescanned} of {checked} directories rescanned "
+                    f"in {time.perf_counter() - start:.2f}s"
+                )
+            else:
+                start = time.perf_counter()
+                count = self.file_index.rebuild(root)
+                out.info(f"[green]Indexed[/green] {root}: {count} entries in {time.perf_counter() - start:.2f}s")
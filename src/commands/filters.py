@@ -0,0 +1,111 @@
+import itertools
+import re
+from collections import Counter
+from utils.options import parse_options
+from utils.output import Column, row_text
+from utils.pipeline import Stream
+
+
+def _column_index(cmd: str, stream: Stream, name: str) -> int:
+    """Position of a column given by name (case-insensitive) or 1-based number."""
+    if name.isdigit() and 1 <= int(name) <= len(stream.columns):
+        return int(name) - 1
+    for index, column in enumerate(stream.columns):
+        if column.name.lower() == name.lower():
+            return index
+    names = ", ".join(column.name for column in stream.columns)
+    raise ValueError(f"{cmd}: no column '{name}' (columns: {names})")
+
+
+def _sort_key(value):
+    # None sorts last, numbers and strings never get compared with each other
+    return (value is None, isinstance(value, str), value if value is not None else 0)
+
+
+class FilterCommands:
+    """
+    Stages that read the records of the command before them in a pipeline.
+    Each method parses its arguments up front and returns apply(stream, out),
+    which is called with the upstream Stream once records start flowing.
+    """
+
+    def grep(self, args):
+        """grep PATTERN [-i] [-v]: keep records whose text matches (-v: doesn't match)."""
+        options, positionals = parse_options("grep", args, {"-i": bool, "-v": bool})
+        if len(positionals) != 1:
+            raise ValueError("grep: usage in a pipeline: grep PATTERN [-i] [-v]")
+        try:
+            regex = re.compile(positionals[0], re.IGNORECASE if options.get("-i") else 0)
+        except re.error as e:
+            raise ValueError(f"grep: invalid pattern: {e}")
+        invert = options.get("-v", False)
+
+        def apply(stream, out):
+            stream.emit(out, (
+                row for row in stream.rows if bool(regex.search(row_text(stream.columns, row))) != invert
+            ))
+
+        return apply
+
+    def head(self, args):
+        """head [N] (or -n N): the first N records (default 10), then stop reading upstream."""
+        options, positionals = parse_options("head", args, {"-n": int})
+        try:
+            count = options.get("-n", int(positionals[0]) if positionals else 10)
+        except ValueError:
+            raise ValueError(f"head: not a number: {positionals[0]}")
+        if count < 0:
+            raise ValueError("head: N must not be negative")
+
+        def apply(stream, out):
+            stream.emit(out, itertools.islice(stream.rows, count))
+
+        return apply
+
+    def sort(self, args):
+        """sort [COLUMN] [-r]: sort by a column (name or number, default the first one)."""
+        options, positionals = parse_options("sort", args, {"-r": bool, "--reverse": bool})
+        reverse = options.get("-r", False) or options.get("--reverse", False)
+
+        def apply(stream, out):
+            index = _column_index("sort", stream, positionals[0]) if positionals else 0
+            stream.emit(out, sorted(stream.rows, key=lambda row: _sort_key(row[index]), reverse=reverse))
+
+        return apply
+
+    def wc(self, args):
+        """wc: count lines (records), words and characters of the upstream output."""
+        if args:
+            raise ValueError("wc: takes no arguments in a pipeline")
+
+        def apply(stream, out):
+            lines = words = chars = 0
+            for row in stream.rows:
+                text = row_text(stream.columns, row)
+                lines += 1
+                words += len(text.split())
+                chars += len(text) + 1
+            columns = [Column("Lines", "green", "right"), Column("Words", "green", "right"),
+                       Column("Chars", "green", "right")]
+            out.table(columns, [(lines, words, chars)])
+
+        return apply
+
+    def count(self, args):
+        """count [COLUMN]: number of records, or records per distinct value of COLUMN."""
+        if len(args) > 1:
+            raise ValueError("count: usage in a pipeline: count [COLUMN]")
+
+        def apply(stream, out):
+            if not args:
+                out.table([Column("Count", "green", "right")], [(sum(1 for _ in stream.rows),)])
+                return
+            index = _column_index("count", stream, args[0])
+            counts = Counter(row[index] for row in stream.rows)
+            column = stream.columns[index]
+            out.table(
+                [column._replace(justify="left"), Column("Count", "green", "right")],
+                counts.most_common(),
+            )
+
+        return apply
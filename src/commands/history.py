@@ -0,0 +1,45 @@
+import time
+from utils.history import History
+from utils.options import parse_options
+from utils.output import Column, Output
+
+
+def _format_time(timestamp: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(timestamp))
+
+
+class HistoryCommands:
+    def __init__(self, history: History):
+        self.history = history
+
+    def show_history(self, args, out: Output):
+        """
+        Show or search the command history.
+        Usage: history [N] | history search TEXT [--limit N]
+        - history N shows the last N commands (default 20)
+        - search lists the newest commands containing TEXT (case-insensitive)
+        Re-run a command with !n (or !-n counting back, !! for the last one).
+        """
+        options, positionals = parse_options("history", args, {"--limit": int})
+        limit = options.get("--limit", 50)
+        if limit < 1:
+            raise ValueError("history: --limit must be positive")
+        columns = [Column("#", "yellow", "right"), Column("When", "dim", format=_format_time), Column("Command", "cyan")]
+
+        if positionals and positionals[0] == "search":
+            if len(positionals) < 2:
+                raise ValueError("history: search requires TEXT")
+            text = " ".join(positionals[1:])
+            shown = out.table(columns, self.history.search(text, limit), title=f"History matching '{text}'")
+            out.info(f"[dim]{shown} matches[/dim]")
+            return
+
+        try:
+            count = int(positionals[0]) if positionals else 20
+        except ValueError:
+            raise ValueError(f"history: not a number: {positionals[0]}")
+        entries = self.history.entries()
+        start = max(0, len(entries) - count)
+        rows = ((number, timestamp, command) for number, (timestamp, command) in enumerate(entries[start:], start + 1))
+        if not out.table(columns, rows, title="History"):
+            out.info("[dim]No history yet[/dim]")
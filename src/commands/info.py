@@ -1,36 +1,38 @@
-from rich.console import Console
-from rich.table import Table
+from utils.output import Column, Output
 
-class InfoCommands:
-    def __init__(self, console: Console):
-        self.console = console
 
-    def show_commands(self, args=None):
+class InfoCommands:
+    def show_commands(self, args, out: Output):
         """Prints a table of available commands and descriptions."""
-        table = Table(title="Available Commands", border_style="bright_blue")
-
-        table.add_column("Command", style="cyan", no_wrap=True)
-        table.add_column("Description", style="white")
+        columns = [Column("Command", "cyan"), Column("Description", "white")]
 
         commands = [
-            ("ls", "List files and directories in the current directory"),
+            ("ls", "List files and directories (--limit N, --page P, --sort name|size|mtime, --reverse)"),
             ("pwd", "Show the current directory path"),
             ("cd", "Change directory"),
             ("mkdir", "Create a new directory"),
-            ("cat", "View a file's content or create and write to it"),
-            ("rm", "Remove a file or directory"),
-            ("mv", "Moves/Renames a file or directory"),
-            ("cpu", "Show CPU usage percentage"),
-            ("mem", "Show memory usage details"),
-            ("processes", "List running processes"),
+            ("cat", "View a file's content (--head N, --tail N, --bytes A:B, --window BYTES) or create and write to it"),
+            ("tail", "Last lines of files, -f follows them as they grow (-n N, --highlight REGEX, --only, --interval S)"),
+            ("rm", "Remove a file or directory (-r, --dry-run)"),
+            ("mv", "Moves/Renames a file or directory (--dry-run)"),
+            ("cp", "Copy a file, or a directory with -r (--dry-run)"),
+            ("find", "Find files recursively ([PATH] --name GLOB --type f|d --size +N|-N --mtime +D|-D --max-results N --no-index)"),
+            ("grep", "Search file contents (PATTERN [PATH ...] -i --name GLOB --max-results N)"),
+            ("du", "Disk usage and the heaviest subtrees ([PATH] --top N --depth D --apparent --no-cache)"),
+            ("index", "Metadata index for ls/find/grep (add PATH, remove PATH, rebuild [PATH], refresh [PATH], status)"),
+            ("cpu", "Show CPU usage percentage per core (--window N for min/avg/max)"),
+            ("mem", "Show memory usage details (--window N for min/avg/max)"),
+            ("processes", "List running processes (--sort pid|name|cpu|rss, --top N, --filter REGEX, --user NAME)"),
+            ("watch / top", "Live CPU, memory and process view (--interval S, --top N, --sort cpu|rss)"),
+            ("history", "Show recent commands ([N]) or search them (search TEXT, --limit N), rerun with !n / !!"),
+            ("CMD | FILTER", "Pipe records into grep PATTERN [-i -v], head [N], sort [COLUMN] [-r], wc, count [COLUMN]"),
+            ("stats", "Per-command, tool call and model request latency (on [--memory], off, reset, export PATH)"),
+            ("context", "Earlier !ai turns sent with new prompts (clear, budget TOKENS)"),
             ("help", "Show this commands table"),
             ("exit / quit", "Exit the terminal"),
         ]
 
-        for cmd, desc in commands:
-            table.add_row(cmd, desc)
-
-        self.console.print(table)
+        out.table(columns, commands, title="Available Commands")
 
-        self.console.print("[magenta]Apart from the above mentioned commands, I can also talk and follow your instructions ^_^[/magenta]")
-        self.console.print("[magenta]Use !ai prefix to talk with me or instruct me.[/magenta]")
+        out.info("[magenta]Apart from the above mentioned commands, I can also talk and follow your instructions ^_^[/magenta]")
+        out.info("[magenta]Use !ai prefix to talk with me or instruct me.[/magenta]")
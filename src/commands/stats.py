@@ -0,0 +1,68 @@
+from utils.instrument import Instrumentation
+from utils.options import parse_options
+from utils.output import Column, Output
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.1f} ms"
+
+
+def _kilobytes(size: int) -> str:
+    return f"{size / 1024:.1f} KB"
+
+
+class StatsCommands:
+    def __init__(self, instrumentation: Instrumentation):
+        self.instrumentation = instrumentation
+
+    def stats(self, args, out: Output):
+        """
+        Latency of commands, AI tool calls and model requests in this session.
+        Usage: stats | stats on [--memory] | stats off | stats reset | stats export PATH
+        - on starts recording (PYTERMINAL_STATS=1 does so from startup), --memory also
+          traces peak Python memory, which slows commands down
+        - export appends every recorded measurement to PATH as JSON lines
+        """
+        options, positionals = parse_options("stats", args, {"--memory": bool})
+        action = positionals[0] if positionals else None
+        instrumentation = self.instrumentation
+
+        if action == "on":
+            instrumentation.enable(trace_memory=options.get("--memory", False))
+            memory = " with memory tracing" if instrumentation.trace_memory else ""
+            out.info(f"[green]Recording stats{memory}[/green]")
+        elif action == "off":
+            instrumentation.disable()
+            out.info("[yellow]Stopped recording stats[/yellow]")
+        elif action == "reset":
+            instrumentation.reset()
+            out.info("[green]Stats cleared[/green]")
+        elif action == "export":
+            if len(positionals) < 2:
+                raise ValueError("stats: export requires a PATH")
+            try:
+                count = instrumentation.export(positionals[1])
+            except OSError as e:
+                out.error(f"[red]stats: cannot write {positionals[1]}: {e}[/red]")
+                return
+            out.info(f"[green]Exported {count} measurements to[/green] {positionals[1]}")
+        elif action is None:
+            columns = [
+                Column("Kind", "blue"),
+                Column("Name", "cyan"),
+                Column("Count", "white", "right"),
+                Column("p50", "green", "right", _ms),
+                Column("p90", "yellow", "right", _ms),
+                Column("p99", "red", "right", _ms),
+                Column("Max", "red", "right", _ms),
+                Column("CPU avg", "magenta", "right", _ms),
+                Column("Peak mem", "blue", "right", _kilobytes),
+            ]
+            rows = instrumentation.summary()
+            if not rows:
+                state = "on" if instrumentation.enabled else "off (enable with: stats on)"
+                out.info(f"[dim]Nothing recorded yet, recording is {state}[/dim]")
+                return
+            out.table(columns, rows, title="Session stats")
+        else:
+            raise ValueError("stats: use on, off, reset or export PATH")
@@ -1,30 +1,264 @@
-import psutil
-from rich.console import Console
+import heapq
+import itertools
+import re
+import time
+from rich.console import Group
+from rich.live import Live
 from rich.table import Table
+from rich.text import Text
+from utils.metrics import MetricsCollector, summarize
+from utils.options import parse_options
+from utils.output import Column, Output
+from utils.processes import ProcessCache
+
+
+def _percent(value: float) -> str:
+    return f"{value:.1f}%"
+
+
+def _megabytes(value: int) -> str:
+    return f"{value / (1024**2):.1f} MB"
+
+
+def _gigabytes(value: int) -> str:
+    return f"{value / (1024**3):.2f} GB"
+
 
 class SystemCommands:
-    def __init__(self, console: Console):
-        self.console = console
-
-    def cpu(self, args):
-        usage = psutil.cpu_percent(interval=1)
-        self.console.print(f"[bold cyan]CPU Usage:[/bold cyan] {usage}%")
-
-    def mem(self, args):
-        mem = psutil.virtual_memory()
-        table = Table(title="Memory Usage")
-        table.add_column("Attribute", style="yellow")
-        table.add_column("Value", style="green")
-        table.add_row("Total", f"{mem.total / (1024**3):.2f} GB")
-        table.add_row("Available", f"{mem.available / (1024**3):.2f} GB")
-        table.add_row("Used", f"{mem.used / (1024**3):.2f} GB")
-        table.add_row("Percentage", f"{mem.percent}%")
-        self.console.print(table)
-
-    def processes(self, args):
-        table = Table(title="Running Processes")
-        table.add_column("PID", style="cyan")
-        table.add_column("Name", style="green")
-        for proc in psutil.process_iter(['pid', 'name']):
-            table.add_row(str(proc.info['pid']), proc.info['name'])
-        self.console.print(table)
+    def __init__(self, metrics: MetricsCollector):
+        self.metrics = metrics
+        self.procs = ProcessCache()
+
+    def _latest_sample(self, cmd: str, out: Output):
+        sample = self.metrics.latest()
+        if sample is None:
+            out.error(f"[red]{cmd}: no metrics sample available yet[/red]")
+        return sample
+
+    def _window(self, cmd: str, args):
+        """Samples for --window N, or None when the option was not given."""
+        options, _ = parse_options(cmd, args, {"--window": float})
+        if "--window" not in options:
+            return None
+        if options["--window"] <= 0:
+            raise ValueError(f"{cmd}: --window must be positive")
+        return self.metrics.window(options["--window"])
+
+    def cpu(self, args, out: Output):
+        """
+        Show CPU usage from the background sampler.
+        - --window N: also show min/avg/max over the last N seconds
+        """
+        window = self._window("cpu", args)
+        sample = self._latest_sample("cpu", out)
+        if sample is None:
+            return
+        out.info(f"[bold cyan]CPU Usage:[/bold cyan] {sample.cpu:.1f}%")
+        if sample.load:
+            load = ", ".join(f"{value:.2f}" for value in sample.load)
+            out.info(f"[bold cyan]Load Average:[/bold cyan] {load}")
+
+        columns = [Column("Core", "yellow"), Column("Usage", "green", format=_percent)]
+        if window:
+            columns += [Column(name, "cyan", format=_percent) for name in ("Min", "Avg", "Max")]
+        rows = []
+        for core, usage in enumerate(sample.per_cpu):
+            row = (core, usage)
+            if window:
+                row += summarize(s.per_cpu[core] for s in window)
+            rows.append(row)
+        out.table(columns, rows, title="Per-Core Usage")
+
+        if window:
+            low, avg, high = summarize(s.cpu for s in window)
+            out.info(
+                f"[bold cyan]Last {len(window)} samples:[/bold cyan] "
+                f"min {low:.1f}%  avg {avg:.1f}%  max {high:.1f}%"
+            )
+
+    def mem(self, args, out: Output):
+        """
+        Show memory usage from the background sampler.
+        - --window N: also show min/avg/max usage over the last N seconds
+        """
+        window = self._window("mem", args)
+        sample = self._latest_sample("mem", out)
+        if sample is None:
+            return
+        mem = sample.mem
+        rows = [
+            ("Total", _gigabytes(mem.total)),
+            ("Available", _gigabytes(mem.available)),
+            ("Used", _gigabytes(mem.used)),
+            ("Percentage", f"{mem.percent}%"),
+        ]
+        if window:
+            low, avg, high = summarize(s.mem.percent for s in window)
+            rows.append((f"Min/Avg/Max ({len(window)} samples)", f"{low:.1f}% / {avg:.1f}% / {high:.1f}%"))
+        out.table([Column("Attribute", "yellow"), Column("Value", "green")], rows, title="Memory Usage")
+
+    def processes(self, args, out: Output):
+        """
+        List running processes with CPU and resident memory.
+        - --sort pid|name|cpu|rss (cpu and rss list the heaviest first)
+        - --top N: only the first N processes after sorting
+        - --filter REGEX: only processes whose name matches
+        - --user NAME: only processes owned by NAME
+        CPU % is measured since the previous scan, so it is blank for new processes.
+        Without --sort rows are streamed in pid order as they are fetched.
+        """
+        options, _ = parse_options(
+            "processes", args, {"--sort": str, "--top": int, "--filter": str, "--user": str}
+        )
+        sort_by = options.get("--sort")
+        top = options.get("--top")
+        if sort_by not in (None, "pid", "name", "cpu", "rss"):
+            raise ValueError(f"processes: cannot sort by '{sort_by}' (use pid, name, cpu or rss)")
+        if top is not None and top < 1:
+            raise ValueError("processes: --top must be positive")
+        try:
+            re.compile(options.get("--filter", ""))
+        except re.error as e:
+            raise ValueError(f"processes: invalid --filter pattern: {e}")
+
+        attrs = ["name", "user", "cpu", "rss"] if "--user" in options else ["name", "cpu", "rss"]
+        new_pids, _ = self.procs.refresh()
+        rows = self.procs.rows(
+            attrs, name_pattern=options.get("--filter"), user=options.get("--user"), skip_cpu=new_pids
+        )
+
+        if sort_by in (None, "pid"):
+            # The cache yields rows in pid order already
+            if top is not None:
+                rows = itertools.islice(rows, top)
+        else:
+            key = {
+                "name": lambda r: (r["name"] or "").lower(),
+                "cpu": lambda r: r["cpu"] or 0.0,
+                "rss": lambda r: r["rss"] or 0,
+            }[sort_by]
+            descending = sort_by in ("cpu", "rss")
+            if top is not None:
+                rows = (heapq.nlargest if descending else heapq.nsmallest)(top, rows, key=key)
+            else:
+                rows = sorted(rows, key=key, reverse=descending)
+
+        columns = [Column("PID", "cyan"), Column("Name", "green")]
+        if "user" in attrs:
+            columns.append(Column("User", "yellow"))
+        columns += [
+            Column("CPU %", "magenta", "right", lambda v: f"{v:.1f}"),
+            Column("RSS", "blue", "right", _megabytes),
+        ]
+        shown = out.table(columns, (tuple(row[c] for c in ["pid", *attrs]) for row in rows), title="Running Processes")
+        out.info(f"[dim]{shown} of {len(self.procs)} processes shown[/dim]")
+
+    def watch(self, args, out: Output):
+        """
+        Live, top-style view of CPU, memory and the busiest processes.
+        - --interval SECONDS between refreshes (default 1)
+        - --top N processes to show (default 15), --sort cpu|rss (default cpu)
+        - --count N: stop after N refreshes instead of waiting for Ctrl+C
+        - --budget PERCENT: refresh CPU cost (of one core) flagged above this (default 2)
+        Each tick only diffs the pid set, ranks processes by the sort attribute alone
+        and fetches the remaining columns for the top N rows.
+        """
+        options, _ = parse_options(
+            "watch", args,
+            {"--interval": float, "--top": int, "--sort": str, "--count": int, "--budget": float},
+        )
+        interval = options.get("--interval", 1.0)
+        top = options.get("--top", 15)
+        sort_by = options.get("--sort", "cpu")
+        count = options.get("--count")
+        budget = options.get("--budget", 2.0)
+        if interval <= 0 or top < 1 or (count is not None and count < 1):
+            raise ValueError("watch: --interval, --top and --count must be positive")
+        if sort_by not in ("cpu", "rss"):
+            raise ValueError(f"watch: cannot sort by '{sort_by}' (use cpu or rss)")
+
+        if not out.interactive:
+            # Nobody is watching a terminal (captured or scripted), report a single snapshot
+            rows, new_pids, gone_pids, cost = self._watch_tick(top, sort_by)
+            sample = self.metrics.latest()
+            if sample is not None:
+                out.info(f"CPU {sample.cpu:.1f}%  Mem {sample.mem.percent:.1f}%")
+            out.table(
+                self._watch_columns(),
+                ((r["pid"], r["name"], r["cpu"], r["rss"]) for r in rows),
+                title=f"Top {top} processes by {sort_by}",
+            )
+            return
+
+        ticks = 0
+        try:
+            with Live(console=out.console, auto_refresh=False, transient=False) as live:
+                while True:
+                    started = time.perf_counter()
+                    rows, new_pids, gone_pids, cost = self._watch_tick(top, sort_by)
+                    live.update(
+                        self._watch_view(rows, len(new_pids), len(gone_pids), cost, interval, budget),
+                        refresh=True,
+                    )
+                    ticks += 1
+                    if count is not None and ticks >= count:
+                        break
+                    time.sleep(max(0.0, interval - (time.perf_counter() - started)))
+        except KeyboardInterrupt:
+            pass
+
+    def _watch_tick(self, top: int, sort_by: str):
+        """One refresh: returns (rows, new_pids, gone_pids, cpu_seconds_spent)."""
+        cpu_started = time.process_time()
+        new_pids, gone_pids = self.procs.refresh()
+        ranked = heapq.nlargest(
+            top,
+            self.procs.rows([sort_by], skip_cpu=new_pids),
+            key=lambda r: r[sort_by] or 0,
+        )
+        rows = []
+        for row in ranked:
+            details = self.procs.fetch(row["pid"], ["name", "cpu" if sort_by == "rss" else "rss"])
+            if details is not None:
+                row.update(details)
+                rows.append(row)
+        return rows, new_pids, gone_pids, time.process_time() - cpu_started
+
+    def _watch_columns(self):
+        return [
+            Column("PID", "cyan"),
+            Column("Name", "green"),
+            Column("CPU %", "magenta", "right", lambda v: f"{v:.1f}"),
+            Column("RSS", "blue", "right", _megabytes),
+        ]
+
+    def _watch_view(self, rows, started: int, exited: int, cost: float, interval: float, budget: float):
+        sample = self.metrics.latest()
+        header = Text()
+        if sample is not None:
+            header.append("CPU ", style="bold cyan")
+            header.append(f"{sample.cpu:5.1f}%  ")
+            header.append("Mem ", style="bold cyan")
+            header.append(
+                f"{sample.mem.percent:5.1f}% ({_gigabytes(sample.mem.used)} / {_gigabytes(sample.mem.total)})  "
+            )
+            if sample.load:
+                header.append("Load ", style="bold cyan")
+                header.append(", ".join(f"{value:.2f}" for value in sample.load))
+
+        table = Table(expand=True)
+        columns = self._watch_columns()
+        for column in columns:
+            table.add_column(column.name, style=column.style, justify=column.justify)
+        for row in rows:
+            values = (row["pid"], row["name"], row["cpu"], row["rss"])
+            table.add_row(*("" if v is None else c.format(v) for c, v in zip(columns, values)))
+
+        # Share of one core spent refreshing, averaged over the refresh interval
+        share = cost / interval * 100
+        footer = Text(
+            f"{len(self.procs)} processes (+{started} / -{exited})  "
+            f"refresh cost {cost * 1000:.1f} ms CPU ({share:.2f}% of one core)  Ctrl+C to stop",
+            style="red" if share > budget else "dim",
+        )
+        return Group(header, table, footer)
@@ -1,12 +1,23 @@
-from utils.parser import CommandParser
-from nlp import process_nlp_input
+import time
+
+# Taken before any other import, for --profile-startup
+_IMPORTS_STARTED = time.perf_counter()
+
+from utils.batch import run_batch, split_commands
 from rich.console import Console
 from rich.prompt import Prompt
 from rich.panel import Panel
 from rich.align import Align
+from rich.table import Table
 from rich.text import Text
 from rich.console import Group
+import argparse
 import os
+import subprocess
+import sys
+import threading
+
+_IMPORTS_DONE = time.perf_counter()
 
 console = Console()
 
@@ -39,22 +50,254 @@ def show_welcome():
     console.print(panel)
 
 
+def setup_line_editing(parser):
+    """
+    Prompt line editing: arrow-key recall and Ctrl+R reverse search seeded with
+    recent history, and Tab completion of commands and paths.
+    """
+    try:
+        import readline  # Provided by pyreadline3 on Windows
+    except ImportError:
+        return
+    from utils.completion import Completer
+
+    for command in parser.history.tail(1000):
+        readline.add_history(command)
+    readline.set_completer(Completer(parser).complete)
+    # Paths are completed as a whole word, not split on '/' or '-'
+    readline.set_completer_delims(" \t\n;|")
+    if "libedit" in (readline.__doc__ or ""):
+        readline.parse_and_bind("bind ^I rl_complete")
+    else:
+        readline.parse_and_bind("tab: complete")
+
+
+def prewarm_ai():
+    """Import the Gemini stack in the background so the first !ai request doesn't pay for it."""
+    def warm():
+        import nlp
+        nlp.prewarm()
+
+    threading.Thread(target=warm, name="pyterminal-prewarm", daemon=True).start()
+
+
+def profile_startup():
+    """Print where startup time goes: startup phases, then the slowest imports."""
+    phases = [("main.py imports", _IMPORTS_DONE - _IMPORTS_STARTED)]
+
+    started = time.perf_counter()
+    from utils.parser import CommandParser
+    parser = CommandParser(console)
+    phases.append(("command modules + CommandParser()", time.perf_counter() - started))
+    parser.metrics.stop()
+
+    started = time.perf_counter()
+    import nlp
+    phases.append(("import nlp (first !ai)", time.perf_counter() - started))
+
+    started = time.perf_counter()
+    try:
+        nlp.get_config()
+        nlp.get_client()
+        phases.append(("Gemini client + config (first !ai)", time.perf_counter() - started))
+    except Exception as e:
+        console.print(f"[red]Could not create Gemini client: {e}[/red]")
+
+    table = Table(title="Startup Phases")
+    table.add_column("Phase", style="cyan")
+    table.add_column("Time", style="green", justify="right")
+    for name, seconds in phases:
+        table.add_row(name, f"{seconds * 1000:.1f} ms")
+    console.print(table)
+
+    # A fresh interpreter with -X importtime gives the per-module breakdown
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main, nlp"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        head, cumulative_us, module = line.split("|")
+        self_us = head.split(":")[1]
+        imports.append((module.strip(), int(self_us), int(cumulative_us)))
+
+    table = Table(title="Slowest Imports (by own time)")
+    table.add_column("Module", style="cyan")
+    table.add_column("Self", style="yellow", justify="right")
+    table.add_column("Cumulative", style="green", justify="right")
+    for module, self_us, cumulative_us in sorted(imports, key=lambda i: i[1], reverse=True)[:15]:
+        table.add_row(module, f"{self_us / 1000:.1f} ms", f"{cumulative_us / 1000:.1f} ms")
+    console.print(table)
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(prog="pyterminal", description="Python Based Smart Terminal for Developers")
+    ap.add_argument("--profile-startup", action="store_true", help="print an import/startup time breakdown and exit")
+    ap.add_argument("--no-prewarm", action="store_true", help="don't load the AI client in the background")
+    ap.add_argument("-c", dest="command", metavar="COMMANDS",
+                    help="run ';' separated commands non-interactively and exit")
+    ap.add_argument("-f", dest="script", metavar="SCRIPT",
+                    help="run the commands in SCRIPT (one per line, '-' for stdin) and exit")
+    ap.add_argument("--stop-on-error", action="store_true", help="in -c/-f mode, stop at the first failing command")
+    ap.add_argument("--serve", action="store_true",
+                    help="run a long-lived server that keeps PyTerminal's state warm for --attach clients")
+    ap.add_argument("--attach", action="store_true",
+                    help="run commands through a running --serve process (interactive, or with -c/-f)")
+    ap.add_argument("--socket", metavar="PATH", help="server socket (default: ~/.pyterminal/pyterminal.sock)")
+    return ap.parse_args(argv)
+
+
+def read_commands(args) -> str | None:
+    """The text of -c or -f, None (after reporting why) if the script can't be read."""
+    if not args.script:
+        return args.command
+    try:
+        if args.script == "-":
+            return sys.stdin.read()
+        with open(args.script, "r", encoding="utf-8") as f:
+            return f.read()
+    except OSError as e:
+        sys.stderr.write(f"pyterminal: cannot read script: {e}\n")
+        return None
+
+
+def run_non_interactive(args) -> int:
+    """-c / -f mode: no prompt, panel or screen clearing, plain text output."""
+    from utils.output import PlainOutput
+    from utils.parser import CommandParser
+
+    text = read_commands(args)
+    if text is None:
+        return 2
+
+    plain_console = Console(no_color=True, highlight=False, soft_wrap=True)
+    parser = CommandParser(plain_console)
+    try:
+        return run_batch(parser, split_commands(text), PlainOutput(), stop_on_error=args.stop_on_error)
+    finally:
+        parser.metrics.stop()
+
+
+def run_attached(args) -> int:
+    """
+    --attach: a thin client. Commands run in the --serve process, which streams
+    their output back; the prompt shows the session's directory on the server.
+    Ctrl+C while a command runs drops the session and starts a new one in the
+    same directory; the server notices the hangup and interrupts the command.
+    With -c / -f the output is plain text and nothing is added to history, as
+    without --attach.
+    """
+    from utils.daemon import Client, default_socket_path
+
+    path = args.socket or default_socket_path()
+    batch = args.command is not None or args.script
+    text = read_commands(args) if batch else ""
+    if text is None:
+        return 2
+
+    def connect(cwd):
+        return Client(path, cwd, console.width, color=not batch and sys.stdout.isatty(), batch=bool(batch))
+
+    try:
+        client = connect(os.getcwd())
+    except OSError as e:
+        sys.stderr.write(f"pyterminal: no server on {path} ({e.strerror or e}), start one with --serve\n")
+        return 2
+    if not batch:
+        try:
+            import readline  # noqa: F401  arrow-key editing and recall at the prompt
+        except ImportError:
+            pass
+
+    try:
+        if batch:
+            status = 0
+            for number, command in enumerate(split_commands(text), 1):
+                if command.lower() in ("exit", "quit"):
+                    break
+                code = client.run(command, sys.stdout)
+                if code:
+                    sys.stderr.write(f"pyterminal: command {number} ({command}) exited with status {code}\n")
+                    status = status or code
+                    if args.stop_on_error:
+                        break
+            return status
+
+        while True:
+            try:
+                prompt_text = f"\n[bold yellow]Current Directory:[/bold yellow] {client.cwd}\n[bold green]PyTerminal>>[/bold green]"
+                user_input = Prompt.ask(prompt_text)
+            except KeyboardInterrupt:
+                console.print("\n[red]Use 'exit' to quit.[/red]")
+                continue
+            except EOFError:
+                return 0
+            console.print("")
+            if user_input.strip().lower() in ["exit", "quit"]:
+                console.print("[bold yellow]Exiting PyTerminal...[/bold yellow]")
+                return 0
+            try:
+                client.run(user_input, sys.stdout)
+            except KeyboardInterrupt:
+                console.print("\n[red]Interrupted, starting a new session.[/red]")
+                client.close()
+                client = connect(client.cwd)
+    except ConnectionError as e:
+        sys.stderr.write(f"pyterminal: lost connection to the server: {e}\n")
+        return 1
+    finally:
+        client.close()
+
+
 def main():
+    args = parse_args()
+    if args.profile_startup:
+        profile_startup()
+        return
+    if args.serve:
+        from utils.daemon import default_socket_path, serve
+        sys.exit(serve(args.socket or default_socket_path(), prewarm=not args.no_prewarm))
+    if args.attach:
+        sys.exit(run_attached(args))
+    if args.command is not None or args.script:
+        sys.exit(run_non_interactive(args))
+
+    from utils.parser import CommandParser
+
     clear_screen()
     show_welcome()  # Display welcome panel
     parser = CommandParser(console)
+    setup_line_editing(parser)
+    parser.history.prewarm()
+    if not args.no_prewarm:
+        prewarm_ai()
 
     while True:
         try:
-            current_dir = os.getcwd()
+            current_dir = parser.fs.current_dir
             prompt_text = f"\n[bold yellow]Current Directory:[/bold yellow] {current_dir}\n[bold green]PyTerminal>>[/bold green]"
             user_input = Prompt.ask(prompt_text)
             console.print("")
+            try:
+                recalled = parser.history.expand(user_input)
+            except ValueError as e:
+                console.print(f"[red]{e}[/red]")
+                continue
+            if recalled is not None:
+                console.print(f"[dim]{recalled}[/dim]")
+                user_input = recalled
+            parser.history.append(user_input)
             if user_input.strip().lower() in ["exit", "quit"]:
                 console.print("[bold yellow]Exiting PyTerminal...[/bold yellow]")
                 break
 
             if user_input.startswith("!ai"):
+                # Imported on first use: the Gemini stack dominates startup time
+                from nlp import process_nlp_input
                 process_nlp_input(user_input.replace("!ai", "", 1).strip(), parser, console)
             else:
                 parser.execute(user_input)
@@ -9,6 +9,9 @@ You can perform all these operations:
 - cat: View a file's content or create and write to it
 - rm: Remove a file or directory
 - mv: Move/Rename a file or directory
+- find: Recursively find files by name, type, size or modification time
+- grep: Recursively search file contents with a regular expression
+- du: Show the disk usage of a directory tree and its largest subdirectories
 - cpu: Show CPU usage percentage
 - mem: Show memory usage details
 - processes: List running processes
@@ -16,5 +19,7 @@ You can perform all these operations:
 - exit / quit: Exit the terminal
 
 You can talk with developers too and execute these operations if instructed.
+You may request several operations in one response; independent ones run in parallel and
+all results come back together, so you can keep chaining operations until the task is done.
 Anything else does not lie in your capability.
 """
\ No newline at end of file
@@ -1,48 +1,130 @@
 import os
 import json
-from dotenv import load_dotenv
-from google import genai
+import logging
+import shlex
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from google.genai import types
+from rich.table import Table
 from agentic_functions import FUNCTION_DEFINITIONS
 from model_instructions import SYSTEM_INSTRUCTIONS
+from utils.budget import CHARS_PER_TOKEN, shape_records
+from utils.cache import ResponseCache
+from utils.instrument import instrumentation
+from utils.output import CaptureOutput
+from utils.paths import data_dir
 
-load_dotenv()
-API_KEY = os.getenv("GEMINI_API_KEY")
-client = genai.Client(api_key=API_KEY)
+logger = logging.getLogger("pyterminal.nlp")
 
-tools = types.Tool(function_declarations=FUNCTION_DEFINITIONS)
+MODEL = "gemini-2.5-flash"
 
+# Upper bound on model requests per !ai prompt
+MAX_AGENT_STEPS = 8
 
+# Threads used to run independent (read-only) function calls concurrently
+TOOL_WORKERS = 4
 
-config = types.GenerateContentConfig(
-    tools=[tools],
-    system_instruction=SYSTEM_INSTRUCTIONS
-)
+# Result limit for find_files / search_files when the model doesn't give one
+DEFAULT_MAX_RESULTS = 200
+
+# Estimated tokens of tool output sent back per function call, and per model turn
+CALL_TOKEN_BUDGET = 2000
+TURN_TOKEN_BUDGET = 6000
+
+# Bytes of a file cat_file reads at most (head and tail), about what one call's budget keeps
+FILE_WINDOW_BYTES = CALL_TOKEN_BUDGET * CHARS_PER_TOKEN
+
+# How each function's output is reduced when it is over budget, see shape_records
+RESULT_KINDS = {
+    "cat_file": "file",
+    "list_processes": "processes",
+    "list_directory": "directory",
+    "find_files": "directory",
+}
+
+# Functions that change terminal state, see is_mutating_call
+MUTATING_FUNCTIONS = {"change_directory", "make_directory", "remove_path", "move_path", "exit_terminal"}
+
+# Read-only functions whose result only depends on the directories they look at
+CACHEABLE_FUNCTIONS = {"list_directory", "print_working_directory", "show_help"}
+
+# Final answers to prompts that used cacheable functions (and only those), kept between sessions
+answer_cache = ResponseCache(max_entries=256, ttl=24 * 3600, path=os.path.join(data_dir(), "ai_cache.json"))
+
+# Results of cacheable function calls, for repeated calls within and across turns
+tool_cache = ResponseCache(max_entries=512, ttl=300)
+
+# Built on first use by get_client() / get_config()
+_client = None
+_config = None
+_init_lock = threading.Lock()
+
+
+def get_client():
+    """The shared Gemini client, created (and .env loaded) on first use."""
+    global _client
+    with _init_lock:
+        if _client is None:
+            from dotenv import load_dotenv
+            from google import genai
+
+            load_dotenv()
+            _client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+        return _client
+
+
+def get_config():
+    """Request config with the tool declarations, built on first use."""
+    global _config
+    with _init_lock:
+        if _config is None:
+            tools = types.Tool(function_declarations=FUNCTION_DEFINITIONS)
+            _config = types.GenerateContentConfig(
+                tools=[tools],
+                system_instruction=SYSTEM_INSTRUCTIONS
+            )
+        return _config
+
+
+def prewarm():
+    """Build the client and config ahead of the first !ai request (errors surface later)."""
+    try:
+        get_config()
+        get_client()
+    except Exception:
+        pass
 
 # ----------------------------
 # Function call handler
 # ----------------------------
-def handle_function_call(func_name: str, func_args: dict, parser, console) -> str:
+def _capture(parser, command: str, content: str | None = None) -> CaptureOutput:
+    out = CaptureOutput()
+    parser.run(command, out, content=content)
+    return out
+
+
+def handle_function_call(func_name: str, func_args: dict, parser, console) -> CaptureOutput:
     """
     Map Gemini function calls to CommandParser commands.
-    Returns captured output as a string.
+    Returns the captured output records (see shape_records for what reaches the model).
     """
-    output = ""
+    output = CaptureOutput()
 
     if func_name == "list_directory":
         path = func_args.get("path", "")
-        output = parser.execute(f"ls {path}".strip(), capture_output=True)
+        output = _capture(parser, f"ls {path}".strip())
 
     elif func_name == "print_working_directory":
-        output = parser.execute("pwd", capture_output=True)
+        output = _capture(parser, "pwd")
 
     elif func_name == "change_directory":
         path = func_args.get("path", "")
-        output = parser.execute(f"cd {path}", capture_output=True)
+        output = _capture(parser, f"cd {path}")
 
     elif func_name == "make_directory":
         path = func_args.get("path", "")
-        output = parser.execute(f"mkdir {path}", capture_output=True)
+        output = _capture(parser, f"mkdir {path}")
 
     elif func_name == "cat_file":
         files = func_args.get("files", [])
@@ -53,32 +135,59 @@ def handle_function_call(func_name: str, func_args: dict, parser, console) -> st
         args_str = " ".join(files)
         if target:
             if mode in ["write", "append"]:
-                parser.execute(f"cat {args_str} {('>' if mode=='write' else '>>')} {target}", capture_output=True, content=content)
+                output = _capture(parser, f"cat {args_str} {('>' if mode=='write' else '>>')} {target}", content=content)
             else:
-                parser.execute(f"cat {args_str}", capture_output=True)
+                output = _capture(parser, f"cat {args_str} --window {FILE_WINDOW_BYTES}")
+        elif content is not None:
+            output = _capture(parser, f"cat {args_str}", content=content)
         else:
-            parser.execute(f"cat {args_str}", capture_output=True, content=content)
+            # Only what the budget can keep is read, however large the file
+            output = _capture(parser, f"cat {args_str} --window {FILE_WINDOW_BYTES}")
+
+    elif func_name == "find_files":
+        command = ["find", func_args.get("path") or "."]
+        for option in ("name", "type", "size", "mtime"):
+            if func_args.get(option):
+                command += [f"--{option}", str(func_args[option])]
+        command += ["--max-results", str(func_args.get("max_results") or DEFAULT_MAX_RESULTS)]
+        output = _capture(parser, shlex.join(command))
+
+    elif func_name == "search_files":
+        command = ["grep", func_args.get("pattern", ""), func_args.get("path") or "."]
+        if func_args.get("ignore_case"):
+            command.append("-i")
+        if func_args.get("name"):
+            command += ["--name", func_args["name"]]
+        command += ["--max-results", str(func_args.get("max_results") or DEFAULT_MAX_RESULTS)]
+        output = _capture(parser, shlex.join(command))
+
+    elif func_name == "disk_usage":
+        command = ["du", func_args.get("path") or "."]
+        for option in ("top", "depth"):
+            if func_args.get(option):
+                command += [f"--{option}", str(func_args[option])]
+        output = _capture(parser, shlex.join(command))
 
     elif func_name == "remove_path":
         path = func_args.get("path", "")
-        output = parser.execute(f"rm {path}", capture_output=True)
+        output = _capture(parser, f"rm {path}")
     
     elif func_name == "move_path":
         source = func_args.get("source", "")
         destination = func_args.get("destination", "")
-        parser.execute(f"mv {source} {destination}", capture_output=True)
+        output = _capture(parser, f"mv {source} {destination}")
 
     elif func_name == "show_cpu":
-        output = parser.execute("cpu", capture_output=True)
+        output = _capture(parser, "cpu")
 
     elif func_name == "show_memory":
-        output = parser.execute("mem", capture_output=True)
+        output = _capture(parser, "mem")
 
     elif func_name == "list_processes":
-        output = parser.execute("processes", capture_output=True)
+        output = _capture(parser, "processes")
 
     elif func_name == "show_help":
-        output = parser.execute("help", capture_output=True)
+        output = _capture(parser, "help")
 
     elif func_name == "exit_terminal":
         console.print(f"[magenta]Hope we meet again ^_^[/magenta]")
@@ -86,62 +195,283 @@ def handle_function_call(func_name: str, func_args: dict, parser, console) -> st
         exit(1)
 
     else:
-        output = f"[red]Function '{func_name}' is not implemented yet[/red]"
+        output.error(f"Function '{func_name}' is not implemented yet")
 
     return output
 
 
+# ----------------------------
+# Response cache
+# ----------------------------
+def _dir_state(path: str) -> int | None:
+    """Directory mtime, which changes whenever an entry is added, removed or renamed."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def call_dependencies(func_name: str, func_args: dict, parser) -> list:
+    """Directories a cacheable call's result depends on."""
+    if func_name == "list_directory":
+        return [os.path.abspath(os.path.join(parser.fs.current_dir, func_args.get("path") or "."))]
+    if func_name == "print_working_directory":
+        return [parser.fs.current_dir]
+    return []
+
+
+def tool_cache_key(func_name: str, func_args: dict, parser) -> str | None:
+    if func_name not in CACHEABLE_FUNCTIONS:
+        return None
+    deps = call_dependencies(func_name, func_args, parser)
+    return json.dumps([func_name, func_args, [(d, _dir_state(d)) for d in deps]], sort_keys=True, default=str)
+
+
+def prompt_cache_key(user_text: str, parser) -> str:
+    normalized = " ".join(user_text.lower().split())
+    return json.dumps([MODEL, normalized, parser.fs.current_dir])
+
+
+def _dependencies_unchanged(entry: dict) -> bool:
+    return all(_dir_state(path) == state for path, state in entry["deps"].items())
+
+
+def cache_stats() -> dict:
+    return {"answers": answer_cache.stats(), "tools": tool_cache.stats()}
+
+
+def clear_caches():
+    answer_cache.clear()
+    tool_cache.clear()
+
+
+def show_cache_stats(console):
+    table = Table(title="AI Cache")
+    table.add_column("Cache", style="cyan")
+    table.add_column("Entries", style="green", justify="right")
+    table.add_column("Hits", style="green", justify="right")
+    table.add_column("Misses", style="yellow", justify="right")
+    table.add_column("Hit Rate", style="magenta", justify="right")
+    for name, stats in cache_stats().items():
+        table.add_row(name, str(stats["entries"]), str(stats["hits"]), str(stats["misses"]), f"{stats['hit_rate']:.0%}")
+    console.print(table)
+
+
+# ----------------------------
+# Tool execution
+# ----------------------------
+def is_mutating_call(func_name: str, func_args: dict) -> bool:
+    """Calls that change terminal state must run alone and in the order the model asked."""
+    if func_name == "cat_file":
+        return func_args.get("mode", "read") != "read"
+    return func_name in MUTATING_FUNCTIONS
+
+
+def run_function_calls(calls, parser, console) -> list:
+    """
+    Execute a batch of function calls from one model response.
+    - Consecutive read-only calls run concurrently on a thread pool
+    - State-changing calls (cd, rm, mv, writes, ...) run alone, in order
+    Returns (name, CaptureOutput, seconds) tuples in the same order as calls.
+    """
+    def timed(call):
+        started = time.perf_counter()
+        args = dict(call.args or {})
+        key = tool_cache_key(call.name, args, parser)
+        result = tool_cache.get(key) if key else None
+        if result is None:
+            try:
+                with instrumentation.span("tool", call.name):
+                    result = handle_function_call(call.name, args, parser, console)
+                if key:
+                    tool_cache.put(key, result)
+            except Exception as e:
+                result = CaptureOutput()
+                result.error(f"Error executing {call.name}: {e}")
+        return call.name, result, time.perf_counter() - started
+
+    results = []
+    batch = []
+    with ThreadPoolExecutor(max_workers=TOOL_WORKERS) as pool:
+        def flush():
+            results.extend(pool.map(timed, batch))
+            batch.clear()
+
+        for call in calls:
+            if is_mutating_call(call.name, dict(call.args or {})):
+                flush()
+                results.append(timed(call))
+            else:
+                batch.append(call)
+        flush()
+    return results
+
+
+def shape_results(results, call_budget: int = CALL_TOKEN_BUDGET, turn_budget: int = TURN_TOKEN_BUDGET) -> list:
+    """
+    Reduce captured tool output to what is sent back to the model: at most call_budget
+    estimated tokens per call and turn_budget for the whole turn, shared by the calls
+    still to come. Small results are shaped first so the budget they leave unused
+    goes to the larger ones. Returns (name, ShapedResult, seconds) tuples in order.
+    """
+    shaped = [None] * len(results)
+    remaining = turn_budget
+    # Rendered once: the length orders the calls and the text is reused for shaping
+    rendered = [output.render() for _, output, _ in results]
+    order = sorted(range(len(results)), key=lambda i: len(rendered[i]))
+    for done, i in enumerate(order):
+        name, output, seconds = results[i]
+        budget = min(call_budget, remaining // (len(results) - done))
+        result = shape_records(output, budget, RESULT_KINDS.get(name), full=rendered[i])
+        remaining -= result.tokens
+        shaped[i] = (name, result, seconds)
+    return shaped
+
+
 # ----------------------------
 # NLP processing function
 # ----------------------------
-def process_nlp_input(user_text: str, parser, console):
+def stream_model_response(client, contents, console):
     """
-    Send user input to Gemini.
-    - If Gemini returns a function call, execute it via handle_function_call.
-    - Then append the function result back to Gemini to get a final response.
-    - If no function call, just print Gemini's response.
+    Request the next model turn with the streaming API.
+    - Text parts are printed as soon as their chunk arrives
+    - Function call parts are collected and returned with the text
+    Returns (model_content, seconds_to_first_chunk). The stream is closed even if
+    the user cancels with Ctrl+C, which propagates as KeyboardInterrupt.
+    """
+    started = time.perf_counter()
+    first_chunk = None
+    text = []
+    calls = []
+    with instrumentation.span("model", MODEL):
+        stream = client.models.generate_content_stream(model=MODEL, contents=contents, config=get_config())
+        try:
+            for chunk in stream:
+                if not chunk.candidates or not chunk.candidates[0].content:
+                    continue
+                for part in chunk.candidates[0].content.parts or []:
+                    if first_chunk is None:
+                        first_chunk = time.perf_counter() - started
+                        logger.info("time to first token: %.3fs", first_chunk)
+                    if part.text:
+                        console.print(part.text, end="", style="magenta", markup=False, highlight=False, soft_wrap=True)
+                        text.append(part.text)
+                    if part.function_call:
+                        calls.append(part)
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+
+    if text:
+        console.print()
+    parts = ([types.Part(text="".join(text))] if text else []) + calls
+    return types.Content(role="model", parts=parts), first_chunk
+
+
+def process_nlp_input(user_text: str, parser, console, client=None, max_steps: int = MAX_AGENT_STEPS):
     """
+    Run the agent loop for one user request.
+    - Stream the next model turn, rendering text as it arrives
+    - Execute every function call in the response (see run_function_calls)
+    - Feed all results back in one turn and repeat until Gemini answers with text,
+      or max_steps model requests were made
+    Timing for each step (including time to first token) is printed so it is visible
+    where latency goes. Ctrl+C cancels the request without leaving the session.
+    Earlier turns of the session (parser.conversation) are sent along, so follow-ups
+    can refer to them; a completed turn is added to it and old turns are compacted
+    once the conversation is over its token budget.
+    Repeated first prompts whose answer only relied on directory listings are served
+    from the answer cache. "--cache-stats" reports on the caches, "--cache-clear" resets them.
+    - client: anything exposing models.generate_content_stream, e.g. a fake client
+      yielding canned chunks in tests
+    """
+    if user_text == "--cache-stats":
+        show_cache_stats(console)
+        return
+    if user_text == "--cache-clear":
+        clear_caches()
+        console.print("[green]AI caches cleared[/green]")
+        return
+
     try:
-        # Initial request
-        contents = [types.Content(role="user", parts=[types.Part(text=user_text)])]
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=contents,
-            config=config
-        )
+        client = client or get_client()
     except Exception as e:
-        console.print(f"[red]Error calling Gemini API: {e}[/red]")
+        console.print(f"[red]Error creating Gemini client: {e}[/red]")
         return
+    conversation = parser.conversation
+    earlier = conversation.contents()
+    turn = [types.Content(role="user", parts=[types.Part(text=user_text)])]
 
-    candidate = response.candidates[0]
-    part = candidate.content.parts[0]
+    # Repeated prompts in the same directory are answered from the cache as long as
+    # every directory the original answer looked at is unchanged. Follow-up prompts
+    # depend on the earlier turns, so only a conversation's first prompt is cached
+    key = prompt_cache_key(user_text, parser)
+    cached = None if earlier else answer_cache.get(key, validate=_dependencies_unchanged)
+    if cached is not None:
+        console.print(cached["text"], style="magenta", markup=False, highlight=False)
+        console.print(f"[dim]cached answer (hit rate {answer_cache.stats()['hit_rate']:.0%})[/dim]")
+        turn.append(types.Content(role="model", parts=[types.Part(text=cached["text"])]))
+        conversation.add(user_text, turn)
+        return
+    deps = {parser.fs.current_dir: _dir_state(parser.fs.current_dir)}
+    cacheable = not earlier
 
-    if part.function_call:
-        func_name = part.function_call.name
-        args = part.function_call.args
+    try:
+        for step in range(1, max_steps + 1):
+            started = time.perf_counter()
+            try:
+                content, first_chunk = stream_model_response(client, earlier + turn, console)
+            except Exception as e:
+                console.print(f"[red]Error calling Gemini API: {e}[/red]")
+                return
+            model_time = time.perf_counter() - started
+            ttft = "-" if first_chunk is None else f"{first_chunk:.2f}s"
 
-        # Capture function output
-        result = handle_function_call(func_name, args, parser, console)
+            calls = [part.function_call for part in content.parts if part.function_call]
+            if not calls:
+                console.print(f"[dim]step {step}: model {model_time:.2f}s (first token {ttft})[/dim]")
+                text = "".join(part.text for part in content.parts if part.text)
+                # Answers without any tool call are open-ended chat (jokes, explanations),
+                # replaying them would be wrong, so only tool-backed answers are cached
+                if cacheable and step > 1 and text:
+                    answer_cache.put(key, {"text": text, "deps": deps})
+                turn.append(content)
+                before, after = conversation.add(user_text, turn)
+                if after < before:
+                    console.print(f"[dim]context compacted: {before} → {after} tokens (see 'context')[/dim]")
+                return
 
-        # Create function response part
-        function_response_part = types.Part.from_function_response(
-            name=func_name,
-            response={"result": result}
-        )
+            for call in calls:
+                if call.name not in CACHEABLE_FUNCTIONS:
+                    cacheable = False
+                for path in call_dependencies(call.name, dict(call.args or {}), parser):
+                    deps.setdefault(path, _dir_state(path))
 
-        # Append the original response + function result for final output
-        contents.append(candidate.content)  # original model content
-        contents.append(types.Content(role="function", parts=[function_response_part]))
+            results = shape_results(run_function_calls(calls, parser, console))
+            tools_time = time.perf_counter() - started - model_time
 
-        # Get final response from Gemini
-        final_response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=contents,
-            config=config
-        )
+            # Append the model's calls and all of their results for the next request
+            turn.append(content)
+            turn.append(types.Content(role="function", parts=[
+                types.Part.from_function_response(name=name, response={"result": shaped.text})
+                for name, shaped, _ in results
+            ]))
 
-        console.print(f"[magenta]{final_response.text}[/magenta]")
+            tool_times = ", ".join(
+                f"{name} {seconds:.2f}s" + (
+                    f" {shaped.original_tokens}→{shaped.tokens} tokens "
+                    f"({shaped.tokens / shaped.original_tokens:.0%}, ~{shaped.original_tokens - shaped.tokens} saved)"
+                    if shaped.tokens < shaped.original_tokens else ""
+                )
+                for name, shaped, seconds in results
+            )
+            console.print(
+                f"[dim]step {step}: model {model_time:.2f}s (first token {ttft}), "
+                f"tools {tools_time:.2f}s ({tool_times})[/dim]"
+            )
+    except KeyboardInterrupt:
+        console.print("\n[yellow]AI request cancelled.[/yellow]")
+        return
 
-    else:
-        # No function call; just print text
-        console.print(f"[magenta]{part.text}[/magenta]")
+    console.print(f"[red]Stopped after {max_steps} steps without a final answer.[/red]")
@@ -0,0 +1,72 @@
+import sys
+
+
+def split_unquoted(text: str, separators: str) -> list:
+    """
+    Split text on any of the separator characters that are not inside quotes or
+    escaped. Quoting is kept for shlex in CommandParser.
+    """
+    parts = []
+    current = []
+    quote = None
+    escaped = False
+    for ch in text:
+        if escaped:
+            current.append(ch)
+            escaped = False
+        elif ch == "\\" and quote != "'":
+            current.append(ch)
+            escaped = True
+        elif quote:
+            current.append(ch)
+            if ch == quote:
+                quote = None
+        elif ch in "'\"":
+            current.append(ch)
+            quote = ch
+        elif ch in separators:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(ch)
+    parts.append("".join(current))
+    return parts
+
+
+def split_commands(text: str) -> list:
+    """
+    Split a command string on ';' and newlines that are not inside quotes.
+    Lines starting with '#' are comments. Quoting is kept for shlex in CommandParser.
+    """
+    # Comments go first, so a ';' or a quote inside one can't split or swallow real commands
+    lines = [line for line in text.split("\n") if not line.strip().startswith("#")]
+    commands = (c.strip() for c in split_unquoted("\n".join(lines), ";\n"))
+    return [c for c in commands if c]
+
+
+def run_batch(parser, commands, out, stop_on_error: bool = False, errors=None) -> int:
+    """
+    Run commands one after another without any prompt or screen handling.
+    - Every command's results go to `out`, failures are reported on `errors` (stderr)
+      with their exit status
+    - exit / quit end the batch early
+    Returns 0 if every command succeeded, otherwise the status of the first failure.
+    """
+    errors = errors if errors is not None else sys.stderr
+    status = 0
+    for number, command in enumerate(commands, 1):
+        if command.lower() in ("exit", "quit"):
+            break
+        out.ok = True
+        if command.startswith("!ai"):
+            from nlp import process_nlp_input
+            process_nlp_input(command.replace("!ai", "", 1).strip(), parser, parser.console)
+            code = 0
+        else:
+            code = parser.run(command, out)
+        if code:
+            errors.write(f"pyterminal: command {number} ({command}) exited with status {code}\n")
+            status = status or code
+            if stop_on_error:
+                break
+    return status
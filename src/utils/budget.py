@@ -0,0 +1,127 @@
+import math
+import os
+from collections import Counter, namedtuple
+from utils.output import CaptureOutput
+
+# Rough size of a token in characters for English text and code
+CHARS_PER_TOKEN = 4
+
+# Longest status/error line passed on unchanged
+MESSAGE_CHARS = 300
+
+# What a tool result was shaped into: text plus its size before and after, in tokens
+ShapedResult = namedtuple("ShapedResult", ["text", "original_tokens", "tokens"])
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _take(lines, budget: int) -> list:
+    """Leading lines whose total length (with newlines) fits in budget characters."""
+    taken = []
+    for line in lines:
+        budget -= len(line) + 1
+        if budget < 0:
+            break
+        taken.append(line)
+    return taken
+
+
+def _window(text: str, budget: int) -> str:
+    """Head and tail of a text with the middle replaced by an omission marker."""
+    lines = text.rstrip("\n").split("\n")
+    head = _take(lines, budget * 2 // 3)
+    tail = _take(reversed(lines[len(head):]), budget - sum(len(line) + 1 for line in head))[::-1]
+    omitted = len(lines) - len(head) - len(tail)
+    if not omitted:
+        return "\n".join(lines)
+    return "\n".join(head + [f"[... {omitted} of {len(lines)} lines omitted ...]"] + tail)
+
+
+def _table_lines(record, row_lines: list, budget: int, summary: str) -> list:
+    header = [line for line in (record["title"], summary, "\t".join(c.name for c in record["columns"])) if line]
+    budget -= sum(len(line) + 1 for line in header)
+    shown = _take(row_lines, budget)
+    lines = header + shown
+    if len(shown) < len(row_lines):
+        lines.append(f"[... {len(row_lines) - len(shown)} more rows ...]")
+    return lines
+
+
+def _processes(record, budget: int) -> list:
+    """Busiest processes first (by CPU, then memory)."""
+    names = [column.name for column in record["columns"]]
+    cpu = next((i for i, name in enumerate(names) if name.startswith("CPU")), None)
+    rss = next((i for i, name in enumerate(names) if name == "RSS"), None)
+
+    def key(row):
+        return tuple(row[i] or 0 for i in (cpu, rss) if i is not None)
+
+    rows = record["rows"]
+    lines = CaptureOutput.row_lines(record)
+    order = sorted(range(len(rows)), key=lambda i: key(rows[i]), reverse=True)
+    return _table_lines(record, [lines[i] for i in order], budget, f"{len(rows)} processes, busiest first")
+
+
+def _directory(record, budget: int) -> list:
+    """Entry counts (directories, files, top extensions) plus a sample of entries."""
+    counts = Counter()
+    dirs = 0
+    for row in record["rows"]:
+        name = str(row[0])
+        if name.endswith("/"):
+            dirs += 1
+            continue
+        # Like os.path.splitext, without its per-call overhead on large listings
+        base = name[name.rfind(os.sep) + 1:]
+        dot = base.rfind(".")
+        counts[base[dot:] if dot > 0 else "(none)"] += 1
+    extensions = counts.most_common(8)
+    total = len(record["rows"])
+    summary = f"{total} entries: {dirs} directories, {total - dirs} files"
+    if extensions:
+        summary += " (" + ", ".join(f"{ext} {count}" for ext, count in extensions) + ")"
+    return _table_lines(record, CaptureOutput.row_lines(record), budget, summary + "; sample:")
+
+
+def shape_records(output: CaptureOutput, budget_tokens: int, kind: str | None = None,
+                  full: str | None = None) -> ShapedResult:
+    """
+    Fit a CaptureOutput's records into budget_tokens for the model.
+    - full: output.render(), if the caller already has it
+    - Results already within budget are passed on exactly as rendered
+    - Messages (errors, status lines) are kept, shortened to MESSAGE_CHARS
+    - kind "file": head and tail of text output; "processes": top-N by CPU/memory;
+      "directory": counts plus a sample of entries; anything else: the first rows/lines
+    """
+    full = output.render() if full is None else full
+    original = estimate_tokens(full)
+    if original <= budget_tokens:
+        return ShapedResult(full, original, original)
+
+    # Room for the omission markers and summaries added below
+    budget = budget_tokens * CHARS_PER_TOKEN - 80
+    records = output.records
+    messages = [r["text"][:MESSAGE_CHARS] for r in records if r["type"] == "message"]
+    bulky = [r for r in records if r["type"] != "message"]
+    budget -= sum(len(m) + 1 for m in messages)
+    share = max(0, budget // max(1, len(bulky)))
+
+    parts = []
+    for record in bulky:
+        if record["type"] == "text":
+            if kind == "file":
+                parts.append(_window(record["text"], share))
+            else:
+                lines = record["text"].split("\n")
+                shown = _take(lines, share)
+                parts.append("\n".join(shown + [f"[... {len(lines) - len(shown)} more lines ...]"]))
+        elif kind == "processes":
+            parts.append("\n".join(_processes(record, share)))
+        elif kind == "directory":
+            parts.append("\n".join(_directory(record, share)))
+        else:
+            parts.append("\n".join(_table_lines(record, CaptureOutput.row_lines(record), share, "")))
+    text = "\n".join(parts + messages).strip()
+    return ShapedResult(text, original, estimate_tokens(text))
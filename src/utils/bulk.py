@@ -0,0 +1,205 @@
+import os
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from utils.walker import WALK_WORKERS, WalkErrors, walk
+
+
+class BulkResult:
+    """Running totals of a bulk copy/remove, filled in as files complete."""
+
+    def __init__(self, files: list, dirs: list):
+        self.total_files = len(files)
+        self.total_bytes = sum(size for _, size in files)
+        self.total_dirs = len(dirs)
+        self.files = 0
+        self.bytes = 0
+        self.dirs = 0
+        self.errors = []
+        self.cancelled = False
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+
+def scan_tree(root: str, errors: WalkErrors | None = None) -> tuple:
+    """
+    Everything below root, collected with the concurrent walker.
+    Returns (dirs, files): dirs are paths with parents before children, files are
+    (path, size) pairs. Symlinks count as files and are never followed.
+    """
+    dirs, files = [], []
+    for entry in walk(root, errors=errors):
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                dirs.append(entry.path)
+            else:
+                files.append((entry.path, entry.stat(follow_symlinks=False).st_size))
+        except OSError:
+            continue
+    dirs.sort(key=lambda path: path.count(os.sep))
+    return dirs, files
+
+
+class _NoProgress:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def update(self, result: BulkResult):
+        pass
+
+
+class BulkProgress:
+    """Rich progress bar showing bytes/s and files/s for a BulkResult."""
+
+    def __init__(self, console, description: str, result: BulkResult):
+        from rich.progress import (
+            BarColumn, DownloadColumn, Progress, TextColumn, TimeRemainingColumn, TransferSpeedColumn,
+        )
+
+        self._progress = Progress(
+            TextColumn("[bold blue]{task.description}"),
+            BarColumn(),
+            DownloadColumn(),
+            TransferSpeedColumn(),
+            TextColumn("{task.fields[files]}"),
+            TimeRemainingColumn(),
+            console=console,
+            transient=True,
+        )
+        self._task = self._progress.add_task(description, total=result.total_bytes or None, files="")
+        self._result = result
+
+    def __enter__(self):
+        self._progress.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._progress.stop()
+        return False
+
+    def update(self, result: BulkResult):
+        rate = result.files / result.elapsed if result.elapsed else 0.0
+        self._progress.update(
+            self._task,
+            completed=result.bytes,
+            files=f"{result.files}/{result.total_files} files ({rate:.0f}/s)",
+        )
+
+
+def progress_for(out, description: str, result: BulkResult):
+    """A progress bar on interactive consoles, a no-op everywhere else."""
+    if out.interactive and getattr(out, "console", None) is not None:
+        return BulkProgress(out.console, description, result)
+    return _NoProgress()
+
+
+def run_parallel(func, items, on_done, result: BulkResult, workers: int = WALK_WORKERS):
+    """
+    Call func(item) for every item on a thread pool, then on_done(item) in the
+    calling thread. A failing item is recorded in result.errors.
+    - At most workers * 4 calls are queued at a time
+    - Ctrl+C stops submitting new work, lets the calls already running finish (so no
+      file is left half-copied) and sets result.cancelled
+    """
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pyterminal-bulk")
+    pending = {}
+
+    def collect(done):
+        for future in done:
+            item = pending.pop(future)
+            try:
+                future.result()
+            except OSError as e:
+                result.errors.append(e)
+                continue
+            on_done(item)
+
+    try:
+        for item in items:
+            pending[pool.submit(func, item)] = item
+            if len(pending) >= workers * 4:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+        while pending:
+            done, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            collect(done)
+    except KeyboardInterrupt:
+        result.cancelled = True
+        for future in list(pending):
+            if future.cancel():
+                pending.pop(future)
+        done, _ = wait(pending)
+        collect(done)
+    finally:
+        pool.shutdown(wait=True)
+
+
+def _copy_one(item):
+    src, dst = item
+    if os.path.islink(src):
+        os.symlink(os.readlink(src), dst)
+    else:
+        shutil.copy2(src, dst, follow_symlinks=False)
+
+
+def copy_tree(src: str, dst: str, dirs: list, files: list, result: BulkResult, progress) -> BulkResult:
+    """Copy a scanned tree (see scan_tree) from src to dst, files in parallel."""
+    try:
+        os.makedirs(dst)
+        for path in dirs:
+            os.makedirs(os.path.join(dst, os.path.relpath(path, src)), exist_ok=True)
+            result.dirs += 1
+    except KeyboardInterrupt:
+        result.cancelled = True
+        return result
+    sizes = dict(files)
+
+    def on_done(item):
+        result.files += 1
+        result.bytes += sizes[item[0]]
+        progress.update(result)
+
+    run_parallel(
+        _copy_one, ((path, os.path.join(dst, os.path.relpath(path, src))) for path, _ in files), on_done, result
+    )
+    if not result.cancelled:
+        for path in reversed([src, *dirs]):
+            try:
+                shutil.copystat(path, os.path.join(dst, os.path.relpath(path, src)))
+            except OSError:
+                pass
+    return result
+
+
+def remove_tree(root: str, dirs: list, files: list, result: BulkResult, progress) -> BulkResult:
+    """Delete a scanned tree (see scan_tree): files in parallel, then directories deepest first."""
+    sizes = dict(files)
+
+    def file_done(path):
+        result.files += 1
+        result.bytes += sizes[path]
+        progress.update(result)
+
+    def dir_done(path):
+        result.dirs += 1
+
+    run_parallel(os.unlink, (path for path, _ in files), file_done, result)
+    if result.cancelled or result.errors:
+        return result
+
+    # Directories of the same depth don't depend on each other
+    by_depth = {}
+    for path in dirs:
+        by_depth.setdefault(path.count(os.sep), []).append(path)
+    for depth in sorted(by_depth, reverse=True):
+        run_parallel(os.rmdir, by_depth[depth], dir_done, result)
+        if result.cancelled or result.errors:
+            return result
+    os.rmdir(root)
+    return result
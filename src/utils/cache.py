@@ -0,0 +1,93 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache with per-entry time-to-live.
+    - Holds at most max_entries values, evicting the least recently used
+    - Entries older than ttl seconds are treated as missing
+    - With a path, entries are loaded lazily from a JSON file and written back
+      on every put, so they survive between sessions (values must be JSON-able)
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 3600, path: str | None = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._loaded = path is None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        self._loaded = True
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for key, (expires, value) in stored.items():
+            if expires > now:
+                self._entries[key] = (expires, value)
+
+    def _save(self):
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+    def get(self, key: str, validate=None):
+        """
+        Cached value for key, or None. Counts towards the hit rate.
+        - validate: optional callable; a value it rejects is evicted and counts as a miss
+        """
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time() or (validate and not validate(entry[1])):
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, value):
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if self.path:
+                self._save()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+            self._loaded = True
+            if self.path:
+                self._save()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,78 @@
+import bisect
+import os
+from collections import OrderedDict
+
+# Directory listings kept for path completion
+COMPLETION_CACHE_DIRS = 64
+
+
+class Completer:
+    """
+    readline completer for command names and paths.
+    - The first word completes against the parser's commands, later words against
+      paths relative to the terminal's current directory
+    - Directory listings are cached sorted, so a prefix is found with bisect; a
+      listing is re-read only when the directory's mtime changed
+    """
+
+    def __init__(self, parser, max_dirs: int = COMPLETION_CACHE_DIRS):
+        self.parser = parser
+        self.max_dirs = max_dirs
+        self._listings = OrderedDict()
+        self._matches = []
+
+    def complete(self, text: str, state: int) -> str | None:
+        """readline's completer protocol: called with state 0, 1, ... until it returns None."""
+        if state == 0:
+            import readline
+
+            line = readline.get_line_buffer()
+            first_word = not line[:readline.get_begidx()].strip()
+            try:
+                self._matches = self.commands(text) if first_word else self.paths(text)
+            except Exception:
+                # An exception here would be swallowed by readline anyway
+                self._matches = []
+        return self._matches[state] if state < len(self._matches) else None
+
+    def commands(self, prefix: str) -> list:
+        return sorted(name for name in self.parser.commands if name.startswith(prefix))
+
+    def paths(self, text: str) -> list:
+        """Entries matching text, directories with a trailing '/'."""
+        head, prefix = os.path.split(text)
+        directory = os.path.join(self.parser.fs.current_dir, os.path.expanduser(head))
+        names = self.listing(os.path.abspath(directory))
+        # Everything starting with prefix sorts between prefix and prefix + the last code point
+        matches = names[bisect.bisect_left(names, prefix):bisect.bisect_left(names, prefix + "\U0010ffff")]
+        if not prefix.startswith("."):
+            matches = [name for name in matches if not name.startswith(".")]
+        base = os.path.join(head, "")
+        return [base + name for name in matches]
+
+    def listing(self, directory: str) -> list:
+        """Sorted entry names of a directory, from the cache while its mtime is unchanged."""
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return []
+        cached = self._listings.get(directory)
+        if cached is not None and cached[0] == mtime:
+            self._listings.move_to_end(directory)
+            return cached[1]
+        names = []
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        names.append(entry.name + "/" if entry.is_dir() else entry.name)
+                    except OSError:
+                        names.append(entry.name)
+        except OSError:
+            return []
+        names.sort()
+        self._listings[directory] = (mtime, names)
+        self._listings.move_to_end(directory)
+        while len(self._listings) > self.max_dirs:
+            self._listings.popitem(last=False)
+        return names
@@ -0,0 +1,152 @@
+import json
+import math
+import threading
+from utils.budget import CHARS_PER_TOKEN, estimate_tokens
+
+# Estimated tokens of earlier turns sent with every !ai request
+CONTEXT_TOKEN_BUDGET = 12000
+
+# Tool results this small are kept when a turn's results are dropped
+KEEP_RESULT_TOKENS = 40
+
+# Compaction states of a turn, from complete to most reduced
+FULL, TRIMMED, SUMMARY = "full", "trimmed", "summary"
+
+
+def _part_chars(part) -> int:
+    if getattr(part, "text", None):
+        return len(part.text)
+    call = getattr(part, "function_call", None)
+    if call is not None:
+        return len(call.name or "") + len(json.dumps(call.args or {}, default=str))
+    response = getattr(part, "function_response", None)
+    if response is not None:
+        return len(response.name or "") + len(json.dumps(response.response or {}, default=str))
+    return 0
+
+
+def content_tokens(contents) -> int:
+    """Estimated tokens of a list of Gemini contents (text, function calls and results)."""
+    chars = sum(_part_chars(part) for content in contents for part in content.parts or [])
+    return math.ceil(chars / CHARS_PER_TOKEN)
+
+
+class Turn:
+    """One !ai exchange: the prompt, every model call and tool result, and the final answer."""
+
+    def __init__(self, prompt: str, contents: list):
+        self.prompt = prompt
+        self.contents = contents
+        self.state = FULL
+        self.calls = [
+            part.function_call.name for content in contents for part in content.parts or [] if part.function_call
+        ]
+        self.tokens = content_tokens(contents)
+
+    @property
+    def answer(self) -> str:
+        last = self.contents[-1]
+        if last.role != "model":
+            return ""
+        return "".join(part.text for part in last.parts or [] if part.text)
+
+    def trim(self):
+        """Replace tool results with a short note, keeping every call/result pair valid."""
+        from google.genai import types
+
+        contents = []
+        for content in self.contents:
+            if content.role != "function":
+                contents.append(content)
+                continue
+            parts = []
+            for part in content.parts or []:
+                dropped = estimate_tokens(json.dumps(part.function_response.response or {}, default=str))
+                if dropped <= KEEP_RESULT_TOKENS:
+                    parts.append(part)
+                    continue
+                parts.append(types.Part.from_function_response(
+                    name=part.function_response.name,
+                    response={"result": f"[result dropped from context, ~{dropped} tokens; call again if needed]"},
+                ))
+            contents.append(types.Content(role="function", parts=parts))
+        self._replace(contents, TRIMMED)
+
+    def summarize(self):
+        """Reduce the turn to the prompt and the final answer, naming the tools it used."""
+        from google.genai import types
+
+        answer = self.answer or "(no answer)"
+        if self.calls:
+            answer += f"\n[tools used: {', '.join(dict.fromkeys(self.calls))}; their results are no longer in context]"
+        self._replace([
+            types.Content(role="user", parts=[types.Part(text=self.prompt)]),
+            types.Content(role="model", parts=[types.Part(text=answer)]),
+        ], SUMMARY)
+
+    def _replace(self, contents: list, state: str):
+        self.contents = contents
+        self.state = state
+        self.tokens = content_tokens(contents)
+
+
+class Conversation:
+    """
+    Earlier turns of a session's AI conversation, so follow-up prompts have context.
+    - Only completed turns are kept (ones ending in a model answer)
+    - Once the total is over budget_tokens, older turns are compacted oldest first:
+      first their tool results are dropped, then they are reduced to prompt and
+      answer, and finally removed. The newest turn is always kept whole, so request
+      size stays bounded by the budget plus one turn
+    """
+
+    def __init__(self, budget_tokens: int = CONTEXT_TOKEN_BUDGET):
+        self.budget_tokens = budget_tokens
+        self.turns = []
+        self.compactions = 0
+        self._lock = threading.Lock()
+
+    def contents(self) -> list:
+        """Contents of every kept turn, oldest first, to prefix the next request with."""
+        with self._lock:
+            return [content for turn in self.turns for content in turn.contents]
+
+    def tokens(self) -> int:
+        with self._lock:
+            return sum(turn.tokens for turn in self.turns)
+
+    def add(self, prompt: str, contents: list) -> tuple:
+        """Store a finished turn and compact. Returns (tokens before, tokens after) compaction."""
+        with self._lock:
+            self.turns.append(Turn(prompt, contents))
+            before = sum(turn.tokens for turn in self.turns)
+            self._compact()
+            return before, sum(turn.tokens for turn in self.turns)
+
+    def set_budget(self, budget_tokens: int) -> tuple:
+        with self._lock:
+            self.budget_tokens = budget_tokens
+            before = sum(turn.tokens for turn in self.turns)
+            self._compact()
+            return before, sum(turn.tokens for turn in self.turns)
+
+    def clear(self):
+        with self._lock:
+            self.turns.clear()
+            self.compactions = 0
+
+    def _compact(self):
+        total = sum(turn.tokens for turn in self.turns)
+        # Cheapest loss first: old tool results, then everything but prompt and answer
+        for reduce, states in ((Turn.trim, (FULL,)), (Turn.summarize, (FULL, TRIMMED))):
+            for turn in self.turns[:-1]:
+                if total <= self.budget_tokens:
+                    return
+                if turn.state in states:
+                    tokens = turn.tokens
+                    reduce(turn)
+                    total += turn.tokens - tokens
+                    self.compactions += 1
+        while total > self.budget_tokens and len(self.turns) > 1:
+            total -= self.turns.pop(0).tokens
+            self.compactions += 1
@@ -0,0 +1,284 @@
+import ctypes
+import json
+import os
+import select
+import socket
+import socketserver
+import sys
+import threading
+from rich.console import Console
+from utils.output import ConsoleOutput, PlainOutput
+from utils.paths import data_dir
+
+# Socket the server listens on unless --socket says otherwise
+SOCKET_NAME = "pyterminal.sock"
+
+# Console width used when a client doesn't report one
+DEFAULT_WIDTH = 100
+
+# Seconds between checks of a session's socket for a hangup while a command runs
+HANGUP_POLL = 0.2
+
+
+def default_socket_path() -> str:
+    return os.path.join(data_dir(), SOCKET_NAME)
+
+
+def _send(wfile, message: dict):
+    wfile.write((json.dumps(message) + "\n").encode("utf-8"))
+    wfile.flush()
+
+
+class ClientGone(ConnectionError):
+    """The client of a session disconnected while a command was writing to it."""
+
+
+class _SocketWriter:
+    """
+    File object for a session's Rich console: everything written is sent to the
+    client as an output message. Once the client is gone every write raises
+    ClientGone, which ends the command that is still running for it.
+    """
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+        self.gone = False
+
+    def write(self, data: str) -> int:
+        if self.gone:
+            raise ClientGone("client disconnected")
+        if data:
+            try:
+                _send(self.wfile, {"type": "output", "data": data})
+            except OSError:
+                self.gone = True
+                raise ClientGone("client disconnected")
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def isatty(self) -> bool:
+        return False
+
+
+def _interrupt(thread: threading.Thread):
+    """Raise KeyboardInterrupt in thread, as Ctrl+C does in the main thread."""
+    ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(thread.ident), ctypes.py_object(KeyboardInterrupt))
+
+
+class _HangupWatch:
+    """
+    Watches a session's socket while one of its commands runs. The client sends
+    nothing until the command is done, so the socket becoming readable means it
+    hung up (Ctrl+C or a killed client). The command is then interrupted as Ctrl+C
+    would interrupt it locally, instead of running on until its next write.
+    - The KeyboardInterrupt lands once the command is back in Python code, so a
+      command blocked in a wait (tail -f between changes) stops within its timeout
+    """
+
+    def __init__(self, sock, writer: _SocketWriter):
+        self.sock = sock
+        self.writer = writer
+        self.target = threading.current_thread()
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._watch, name="pyterminal-hangup", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self._done.set()
+        self._thread.join()
+
+    def _watch(self):
+        while not self._done.is_set():
+            ready, _, _ = select.select([self.sock], [], [], HANGUP_POLL)
+            if not ready:
+                continue
+            try:
+                hung_up = not self.sock.recv(1, socket.MSG_PEEK)
+            except OSError:
+                hung_up = True
+            if not hung_up:
+                # A message sent early: leave it for the session to read after the command
+                self._done.wait()
+                return
+            with self._lock:
+                if not self._done.is_set():
+                    self.writer.gone = True
+                    _interrupt(self.target)
+            return
+
+
+class _SessionHandler(socketserver.StreamRequestHandler):
+    """
+    One attached client. Protocol (JSON lines):
+    - client: {"type": "hello", "cwd", "width", "color", "batch"} once, then {"type": "run", "line"}
+    - server: {"type": "output", "data"} while a command runs, then {"type": "done", "status", "cwd"}
+    - A batch session (-c / -f) gets plain output and no history, as local -c does
+    - A client hanging up interrupts the command running for it
+    """
+
+    def handle(self):
+        from utils.parser import CommandParser
+
+        try:
+            hello = json.loads(self.rfile.readline() or b"{}")
+        except ValueError:
+            return
+        writer = _SocketWriter(self.wfile)
+        batch = bool(hello.get("batch"))
+        color = bool(hello.get("color")) and not batch
+        console = Console(
+            file=writer,
+            width=int(hello.get("width") or DEFAULT_WIDTH),
+            force_terminal=color,
+            no_color=not color,
+            color_system="truecolor" if color else None,
+            highlight=color,
+            soft_wrap=batch,
+        )
+        parser = CommandParser(console, shared=self.server.parser)
+        if os.path.isdir(hello.get("cwd") or ""):
+            parser.fs.current_dir = hello["cwd"]
+
+        try:
+            for raw in self.rfile:
+                message = json.loads(raw)
+                if message.get("type") != "run":
+                    continue
+                with _HangupWatch(self.connection, writer):
+                    if batch:
+                        status = self.run_batch_line(message.get("line", ""), parser, writer)
+                    else:
+                        status = self.run_line(message.get("line", ""), parser, console)
+                _send(self.wfile, {"type": "done", "status": status, "cwd": parser.fs.current_dir})
+        except (OSError, ValueError, SystemExit, KeyboardInterrupt):
+            # Disconnects (and the interrupt they cause), garbled messages and the
+            # AI's exit_terminal all end the session
+            pass
+
+    def run_batch_line(self, line: str, parser, writer: _SocketWriter) -> int:
+        if line.startswith("!ai"):
+            from nlp import process_nlp_input
+            process_nlp_input(line.replace("!ai", "", 1).strip(), parser, parser.console)
+            return 0
+        return parser.run(line, PlainOutput(writer))
+
+    def run_line(self, line: str, parser, console) -> int:
+        try:
+            recalled = parser.history.expand(line)
+        except ValueError as e:
+            console.print(f"[red]{e}[/red]")
+            return 2
+        if recalled is not None:
+            console.print(f"[dim]{recalled}[/dim]")
+            line = recalled
+        if not line.strip():
+            return 0
+        parser.history.append(line)
+
+        if line.startswith("!ai"):
+            from nlp import process_nlp_input
+            process_nlp_input(line.replace("!ai", "", 1).strip(), parser, console)
+            return 0
+        return parser.run(line, ConsoleOutput(console, interactive=False))
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _server_running(path: str) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+            return True
+        except OSError:
+            return False
+
+
+def serve(path: str, prewarm: bool = True) -> int:
+    """
+    Run the PyTerminal server until interrupted.
+    - One CommandParser holds the shared state: metrics sampler, history, file index.
+      The Gemini client and AI caches are module-level in nlp, so they are shared too
+    - Every connection is a session with its own parser and working directory,
+      served on its own thread
+    """
+    from utils.parser import CommandParser
+
+    if not hasattr(socket, "AF_UNIX"):
+        sys.stderr.write("pyterminal: --serve needs Unix domain sockets, not available on this platform\n")
+        return 2
+    if os.path.exists(path):
+        if _server_running(path):
+            sys.stderr.write(f"pyterminal: a server is already listening on {path}\n")
+            return 1
+        os.unlink(path)  # Left behind by a server that didn't shut down cleanly
+
+    log = Console(stderr=True)
+    parser = CommandParser(Console(quiet=True))
+    parser.history.prewarm()
+    if prewarm:
+        def warm():
+            import nlp
+            nlp.prewarm()
+
+        threading.Thread(target=warm, name="pyterminal-prewarm", daemon=True).start()
+
+    # Only the owner may attach: sessions run commands with the server's permissions
+    old_umask = os.umask(0o177)
+    try:
+        server = _Server(path, _SessionHandler)
+    finally:
+        os.umask(old_umask)
+    server.parser = parser
+    log.print(f"[green]PyTerminal server listening on[/green] {path} [dim](Ctrl+C to stop)[/dim]")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        log.print("[yellow]Stopping PyTerminal server...[/yellow]")
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+        parser.metrics.stop()
+        parser.history.close()
+    return 0
+
+
+class Client:
+    """Connection of a thin client to the server, one command at a time."""
+
+    def __init__(self, path: str, cwd: str, width: int, color: bool, batch: bool = False):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path)
+        self.rfile = self.sock.makefile("rb")
+        self.wfile = self.sock.makefile("wb")
+        self.cwd = cwd
+        _send(self.wfile, {"type": "hello", "cwd": cwd, "width": width, "color": color, "batch": batch})
+
+    def run(self, line: str, stdout) -> int:
+        """Send one command line, writing its output to stdout as it arrives. Returns its status."""
+        _send(self.wfile, {"type": "run", "line": line})
+        for raw in self.rfile:
+            message = json.loads(raw)
+            if message["type"] == "output":
+                stdout.write(message["data"])
+                stdout.flush()
+            elif message["type"] == "done":
+                self.cwd = message["cwd"]
+                return message["status"]
+        raise ConnectionError("the server closed the session")
+
+    def close(self):
+        for f in (self.rfile, self.wfile, self.sock):
+            try:
+                f.close()
+            except OSError:
+                pass
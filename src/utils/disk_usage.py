@@ -0,0 +1,139 @@
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from utils.walker import WALK_WORKERS, WalkErrors
+
+# What one directory holds itself (its own entry and its files, not subdirectories),
+# valid while the directory's mtime is unchanged. links are (dev, ino, size, blocks)
+# of files with more than one hard link, counted once per tree
+DirUsage = namedtuple("DirUsage", ["mtime_ns", "size", "blocks", "files", "links", "subdirs"])
+
+# Total of one directory and everything below it
+SubtreeUsage = namedtuple("SubtreeUsage", ["path", "depth", "size", "disk", "files"])
+
+# Directories whose usage is remembered between runs
+DU_CACHE_DIRS = 1_000_000
+
+
+def _blocks(st: os.stat_result) -> int:
+    """Allocated bytes (st_size where the platform doesn't report blocks)."""
+    blocks = getattr(st, "st_blocks", None)
+    return st.st_size if blocks is None else blocks * 512
+
+
+def _scan_dir(path: str, st: os.stat_result) -> DirUsage:
+    # The directory itself counts too, as it does for du
+    size, blocks, files = st.st_size, _blocks(st), 0
+    links = []
+    subdirs = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                    continue
+                est = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            files += 1
+            file_blocks = _blocks(est)
+            if est.st_nlink > 1:
+                links.append((est.st_dev, est.st_ino, est.st_size, file_blocks))
+            else:
+                size += est.st_size
+                blocks += file_blocks
+    return DirUsage(st.st_mtime_ns, size, blocks, files, tuple(links), tuple(subdirs))
+
+
+class DiskUsage:
+    """
+    Sizes of directory trees, for du.
+    - Directories are read concurrently; each directory's own files are summed once
+      and remembered with the directory's mtime, so an unchanged directory costs a
+      single stat on the next run
+    - A file changing size in place doesn't touch its directory's mtime, so such
+      changes are only seen after clear() (or du --no-cache)
+    - Hard links are counted once per run, by (device, inode)
+    - Symlinks are counted as themselves and never followed
+    """
+
+    def __init__(self, max_dirs: int = DU_CACHE_DIRS):
+        self.max_dirs = max_dirs
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def _usage(self, path: str, use_cache: bool, errors: WalkErrors) -> tuple:
+        """(path, DirUsage or None, came from the cache)"""
+        try:
+            st = os.stat(path, follow_symlinks=False)
+            if use_cache:
+                cached = self._cache.get(path)
+                if cached is not None and cached.mtime_ns == st.st_mtime_ns:
+                    return path, cached, True
+            usage = _scan_dir(path, st)
+        except OSError as e:
+            errors.add(e)
+            return path, None, False
+        with self._lock:
+            if len(self._cache) < self.max_dirs or path in self._cache:
+                self._cache[path] = usage
+        return path, usage, False
+
+    def scan(self, root: str, use_cache: bool = True, workers: int = WALK_WORKERS, errors: WalkErrors | None = None):
+        """
+        Usage of root and every directory below it.
+        Returns (subtrees, stats): SubtreeUsage per directory (root included, depth 0)
+        and a dict with dirs, cached (directories answered from the cache) and
+        hardlinks (extra links not counted again).
+        """
+        errors = errors if errors is not None else WalkErrors()
+        found = {}
+        cached = 0
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pyterminal-du")
+        try:
+            pending = {pool.submit(self._usage, root, use_cache, errors)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path, usage, hit = future.result()
+                    if usage is None:
+                        continue
+                    found[path] = usage
+                    cached += hit
+                    for name in usage.subdirs:
+                        pending.add(pool.submit(self._usage, os.path.join(path, name), use_cache, errors))
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        # Every inode with several links is charged to the first directory holding it
+        own = {path: [usage.size, usage.blocks, usage.files] for path, usage in found.items()}
+        seen = set()
+        duplicates = 0
+        for path in sorted(found):
+            for dev, ino, size, blocks in found[path].links:
+                if (dev, ino) in seen:
+                    duplicates += 1
+                    continue
+                seen.add((dev, ino))
+                own[path][0] += size
+                own[path][1] += blocks
+
+        # Children before parents: sum every subtree into its parent
+        root = root.rstrip(os.sep) or os.sep
+        base = root.count(os.sep) - (root == os.sep)
+        subtrees = []
+        for path in sorted(found, key=lambda p: p.count(os.sep), reverse=True):
+            size, disk, files = own[path]
+            subtrees.append(SubtreeUsage(path, path.count(os.sep) - base if path != root else 0, size, disk, files))
+            parent = os.path.dirname(path)
+            if path != root and parent in own:
+                own[parent][0] += size
+                own[parent][1] += disk
+                own[parent][2] += files
+        stats = {"dirs": len(found), "cached": cached, "hardlinks": duplicates}
+        return subtrees, stats
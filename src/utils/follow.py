@@ -0,0 +1,216 @@
+import codecs
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+
+# Seconds between checks when inotify is not available
+POLL_INTERVAL = 0.5
+
+# Seconds between safety re-checks of every file while inotify reports nothing
+INOTIFY_RECHECK = 5.0
+
+# Bytes read at a time from a followed file
+READ_SIZE = 64 * 1024
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT = struct.Struct("iIII")
+
+# Everything that can mean new data, truncation or rotation of a file in a watched directory
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+
+class Inotify:
+    """Minimal ctypes binding of Linux inotify. Raises OSError where it isn't available."""
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path: str, mask: int = WATCH_MASK) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code), path)
+        return wd
+
+    def read(self, timeout: float | None) -> list:
+        """(watch descriptor, mask, name) of pending events, [] if none arrived within timeout."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class FollowedFile:
+    """
+    One file being followed: its open handle, identity (device, inode) and read position.
+    A different inode at the path means the file was rotated, a size below the
+    read position means it was truncated.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = None
+        self.identity = None
+        self.pos = 0
+        self.pending = ""
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def open(self, offset: int | None = None):
+        """Open the file at path, at offset (default: its end)."""
+        f = open(self.path, "rb")
+        st = os.fstat(f.fileno())
+        self.close()
+        self.file = f
+        self.identity = (st.st_dev, st.st_ino)
+        self.pos = f.seek(st.st_size if offset is None else offset)
+        self.decoder.reset()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def check(self) -> tuple:
+        """
+        Read what was appended since the last check.
+        Returns (complete lines, note) where note is None, "truncated" or "rotated".
+        A partial last line is kept until its newline arrives.
+        """
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            st = None
+        if st is not None and (st.st_dev, st.st_ino) != self.identity:
+            # Rotated: finish the old file, then start the new one from its beginning
+            lines = self._read_all() + self.flush()
+            try:
+                self.open(0)
+            except OSError:
+                return lines, None
+            return lines + self._read_all(), "rotated"
+        if st is not None and st.st_size < self.pos:
+            self.pending = ""
+            self.pos = self.file.seek(0)
+            self.decoder.reset()
+            return self._read_all(), "truncated"
+        return self._read_all(), None
+
+    def _read_all(self) -> list:
+        if self.file is None:
+            return []
+        text = []
+        while True:
+            block = self.file.read(READ_SIZE)
+            if not block:
+                break
+            self.pos += len(block)
+            text.append(self.decoder.decode(block))
+        if not text:
+            return []
+        *lines, self.pending = (self.pending + "".join(text)).split("\n")
+        return lines
+
+    def flush(self) -> list:
+        """The partial last line (if any), for when no newline is coming."""
+        rest = self.pending + self.decoder.decode(b"", final=True)
+        self.pending = ""
+        return [rest] if rest else []
+
+
+class Follower:
+    """
+    Waits for followed files to change and reads only what was appended.
+    - On Linux the files' directories are watched with inotify, so waiting costs
+      no CPU and rotation (a new file created or moved to the path) is noticed
+    - Elsewhere, or if inotify can't be set up, every file is checked with one stat
+      each interval seconds
+    """
+
+    def __init__(self, files: list, interval: float = POLL_INTERVAL):
+        self.files = files
+        self.interval = interval
+        self.inotify = None
+        self._watched = {}
+        try:
+            inotify = Inotify()
+        except OSError:
+            return
+        try:
+            for followed in files:
+                directory = os.path.dirname(followed.path)
+                wd = inotify.add_watch(directory)
+                self._watched.setdefault(wd, {})[os.path.basename(followed.path)] = followed
+        except OSError:
+            inotify.close()
+            self._watched = {}
+            return
+        self.inotify = inotify
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if self.inotify is not None else f"polling every {self.interval:g}s"
+
+    def changes(self):
+        """Yield (FollowedFile, lines, note) whenever a file has new lines or was rotated/truncated."""
+        while True:
+            for followed in self._wait():
+                lines, note = followed.check()
+                if lines or note:
+                    yield followed, lines, note
+
+    def _wait(self) -> list:
+        if self.inotify is None:
+            time.sleep(self.interval)
+            return self.files
+        events = self.inotify.read(INOTIFY_RECHECK)
+        if not events or any(mask & IN_Q_OVERFLOW for _, mask, _ in events):
+            return self.files
+        changed = []
+        for wd, _, name in events:
+            followed = self._watched.get(wd, {}).get(name)
+            if followed is not None and followed not in changed:
+                changed.append(followed)
+        return changed
+
+    def close(self):
+        if self.inotify is not None:
+            self.inotify.close()
+        for followed in self.files:
+            followed.close()
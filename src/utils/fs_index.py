@@ -0,0 +1,270 @@
+import os
+import sqlite3
+import threading
+import time
+from utils.paths import data_dir
+from utils.walker import walk
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS roots (path TEXT PRIMARY KEY, refreshed_at REAL);
+CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, mtime_ns INTEGER);
+CREATE TABLE IF NOT EXISTS entries (
+    parent TEXT NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER,
+    mtime REAL,
+    is_dir INTEGER,
+    PRIMARY KEY (parent, name)
+);
+"""
+
+# Rows written per executemany call while indexing, and fetched at a time by search
+_BATCH = 5000
+
+
+def _subtree(column: str) -> str:
+    """SQL condition for `column` being a root or anything below it (uses the index)."""
+    return f"({column} = ? OR ({column} >= ? AND {column} < ?))"
+
+
+def _subtree_args(root: str) -> tuple:
+    # Paths below root sort between "root/" and "root0" ('0' follows '/')
+    prefix = root.rstrip(os.sep) + os.sep
+    return root, prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+
+def _sql_glob(pattern: str) -> str:
+    """An fnmatch pattern as an SQLite GLOB: the same wildcards, but [^...] negates a set."""
+    return pattern.replace("[!", "[^")
+
+
+class FileIndex:
+    """
+    On-disk SQLite index of path, size, mtime and type for chosen root directories.
+    - Directory mtimes are recorded so a listing can be served after a single stat,
+      and refresh() only rescans directories whose mtime changed
+    - Changes to a file's size or mtime don't touch its directory, so those are only
+      picked up by rebuild()
+    - The database is opened on first use; nothing is read if no roots were added
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.path.join(data_dir(), "index.db")
+        self._conn = None
+        self._roots = None
+        self._lock = threading.RLock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def roots(self) -> dict:
+        """Indexed roots mapped to their last refresh time."""
+        with self._lock:
+            if self._roots is None:
+                if not os.path.exists(self.path):
+                    self._roots = {}
+                else:
+                    self._roots = dict(self._db().execute("SELECT path, refreshed_at FROM roots"))
+            return dict(self._roots)
+
+    def root_for(self, path: str) -> str | None:
+        """The indexed root containing path, if any."""
+        for root in self.roots():
+            if path == root or path.startswith(root.rstrip(os.sep) + os.sep):
+                return root
+        return None
+
+    def rebuild(self, root: str) -> int:
+        """(Re)index everything below root from scratch. Returns the number of entries."""
+        with self._lock:
+            db = self._db()
+            with db:
+                self._forget(db, root)
+                count = self._index_tree(db, root)
+                db.execute("INSERT OR REPLACE INTO roots VALUES (?, ?)", (root, time.time()))
+            self._roots = None
+            return count
+
+    def remove(self, root: str):
+        with self._lock:
+            db = self._db()
+            with db:
+                self._forget(db, root)
+                db.execute("DELETE FROM roots WHERE path = ?", (root,))
+            self._roots = None
+
+    def refresh(self, path: str) -> tuple:
+        """
+        Bring the index of path (an indexed root or any directory below one) up to date
+        by rescanning only directories whose mtime changed. The directories between
+        the root and path are checked too, so a directory created since the last
+        refresh is picked up. Returns (directories checked, directories rescanned).
+        """
+        root = self.root_for(path)
+        if root is None:
+            return 0, 0
+        ancestors = []
+        parent = path
+        while parent != root:
+            parent = os.path.dirname(parent)
+            ancestors.append(parent)
+        with self._lock:
+            db = self._db()
+            checked = rescanned = 0
+            with db:
+                # Outermost first: a rescanned parent indexes its new subdirectories
+                known = [
+                    row for ancestor in reversed(ancestors)
+                    for row in db.execute("SELECT path, mtime_ns FROM dirs WHERE path = ?", (ancestor,))
+                ]
+                known += db.execute(
+                    f"SELECT path, mtime_ns FROM dirs WHERE {_subtree('path')}", _subtree_args(path)
+                ).fetchall()
+                for dir_path, mtime_ns in known:
+                    checked += 1
+                    try:
+                        current = os.stat(dir_path).st_mtime_ns
+                    except OSError:
+                        current = None
+                    if current == mtime_ns:
+                        continue
+                    row = db.execute("SELECT mtime_ns FROM dirs WHERE path = ?", (dir_path,)).fetchone()
+                    if row is None or row[0] == current:
+                        # Gone with a rescanned parent, or indexed afresh by one
+                        continue
+                    rescanned += 1
+                    if current is None:
+                        self._forget(db, dir_path)
+                    else:
+                        self._rescan_dir(db, dir_path, current)
+                if path == root:
+                    db.execute("INSERT OR REPLACE INTO roots VALUES (?, ?)", (root, time.time()))
+                    self._roots = None
+            return checked, rescanned
+
+    def listing(self, path: str) -> list | None:
+        """
+        (name, size, mtime, is_dir) rows for a directory, or None when it is not
+        indexed or changed since it was indexed (checked with one stat).
+        """
+        if not self.root_for(path):
+            return None
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT mtime_ns FROM dirs WHERE path = ?", (path,)).fetchone()
+            try:
+                if row is None or os.stat(path).st_mtime_ns != row[0]:
+                    return None
+            except OSError:
+                return None
+            return [
+                (name, size, mtime, bool(is_dir))
+                for name, size, mtime, is_dir in db.execute(
+                    "SELECT name, size, mtime, is_dir FROM entries WHERE parent = ?", (path,)
+                )
+            ]
+
+    def search(self, root: str, name: str | None = None, kind: str | None = None):
+        """
+        Yield (path, size, mtime, is_dir) for indexed entries below root.
+        The name glob and the type are matched by SQLite, rows are fetched in batches.
+        """
+        where = _subtree("parent")
+        args = list(_subtree_args(root))
+        if name:
+            where += " AND name GLOB ?"
+            args.append(_sql_glob(name))
+        if kind in ("f", "d"):
+            where += " AND is_dir = ?"
+            args.append(int(kind == "d"))
+        with self._lock:
+            cursor = self._db().execute(f"SELECT parent, name, size, mtime, is_dir FROM entries WHERE {where}", args)
+            rows = cursor.fetchmany(_BATCH)
+        while rows:
+            for parent, entry_name, size, mtime, is_dir in rows:
+                yield os.path.join(parent, entry_name), size, mtime, bool(is_dir)
+            with self._lock:
+                rows = cursor.fetchmany(_BATCH)
+
+    def status(self) -> list:
+        """(root, entries, directories, seconds since refresh, stale directories) per root."""
+        report = []
+        with self._lock:
+            db = self._db() if self.roots() else None
+            for root, refreshed_at in self.roots().items():
+                args = _subtree_args(root)
+                entries = db.execute(f"SELECT COUNT(*) FROM entries WHERE {_subtree('parent')}", args).fetchone()[0]
+                dirs = db.execute(f"SELECT path, mtime_ns FROM dirs WHERE {_subtree('path')}", args).fetchall()
+                stale = 0
+                for path, mtime_ns in dirs:
+                    try:
+                        stale += os.stat(path).st_mtime_ns != mtime_ns
+                    except OSError:
+                        stale += 1
+                report.append((root, entries, len(dirs), time.time() - (refreshed_at or 0), stale))
+        return report
+
+    def _forget(self, db, root: str):
+        args = _subtree_args(root)
+        db.execute(f"DELETE FROM entries WHERE {_subtree('parent')}", args)
+        db.execute(f"DELETE FROM dirs WHERE {_subtree('path')}", args)
+        parent, name = os.path.split(root)
+        db.execute("DELETE FROM entries WHERE parent = ? AND name = ?", (parent, name))
+
+    def _index_tree(self, db, root: str) -> int:
+        db.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?)", (root, os.stat(root).st_mtime_ns))
+        entries, dirs, count = [], [], 0
+        for entry in walk(root):
+            try:
+                st = entry.stat(follow_symlinks=False)
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            entries.append((os.path.dirname(entry.path), entry.name, st.st_size, st.st_mtime, int(is_dir)))
+            if is_dir:
+                dirs.append((entry.path, st.st_mtime_ns))
+            if len(entries) >= _BATCH:
+                count += self._flush(db, entries, dirs)
+        return count + self._flush(db, entries, dirs)
+
+    def _flush(self, db, entries: list, dirs: list) -> int:
+        db.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)", entries)
+        db.executemany("INSERT OR REPLACE INTO dirs VALUES (?, ?)", dirs)
+        count = len(entries)
+        entries.clear()
+        dirs.clear()
+        return count
+
+    def _rescan_dir(self, db, path: str, mtime_ns: int):
+        """Re-read one changed directory: update its entries, index new subdirectories."""
+        old = {
+            name: bool(is_dir)
+            for name, is_dir in db.execute("SELECT name, is_dir FROM entries WHERE parent = ?", (path,))
+        }
+        rows, new_dirs = [], []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    rows.append((path, entry.name, st.st_size, st.st_mtime, int(is_dir)))
+                    if is_dir and not old.get(entry.name):
+                        new_dirs.append(entry.path)
+                    old.pop(entry.name, None)
+        except OSError:
+            self._forget(db, path)
+            return
+        for name, is_dir in old.items():
+            if is_dir:
+                self._forget(db, os.path.join(path, name))
+            db.execute("DELETE FROM entries WHERE parent = ? AND name = ?", (path, name))
+        db.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)", rows)
+        db.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?)", (path, mtime_ns))
+        for new_dir in new_dirs:
+            self._index_tree(db, new_dir)
@@ -0,0 +1,224 @@
+import atexit
+import os
+import queue
+import re
+import threading
+import time
+from array import array
+from collections import deque
+from utils.paths import data_dir
+
+# The history file is rotated to history.1 once it grows past this size
+HISTORY_MAX_BYTES = 8 * 1024 * 1024
+
+# Bytes read from the end of the file to seed the prompt's line editor
+_TAIL_BYTES = 64 * 1024
+
+_RECALL = re.compile(r"^!(!|-?\d+)$")
+
+
+def _trigrams(text: str) -> set:
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class History:
+    """
+    Persistent command history, one "timestamp<TAB>command" line per entry.
+    - append() hands the line to a writer thread, so recording never delays a command
+    - The file is only read when the history is first looked at
+    - Searches use a trigram index, built off-thread by prewarm() (or the first search)
+      and kept up to date; until it is ready searches scan the entries
+    - Past HISTORY_MAX_BYTES the file is rotated: the older half moves to history.1
+    """
+
+    def __init__(self, path: str | None = None, max_bytes: int = HISTORY_MAX_BYTES):
+        self.path = path or os.path.join(data_dir(), "history")
+        self.max_bytes = max_bytes
+        self._entries = None
+        self._trigrams = None
+        self._lowered = None
+        self._indexing = False
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._pending = deque()
+        self._writer = None
+
+    def append(self, command: str):
+        command = command.strip()
+        if not command:
+            return
+        timestamp = time.time()
+        with self._lock:
+            # Sessions of the daemon share one History, only one of them may start the writer
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="pyterminal-history", daemon=True)
+                self._writer.start()
+                atexit.register(self.close)
+            if self._entries is not None:
+                self._add(timestamp, command)
+            self._pending.append((timestamp, command))
+        self._queue.put((timestamp, command))
+
+    def close(self):
+        """Wait for queued entries to reach the file."""
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join(timeout=2)
+            self._writer = None
+
+    def entries(self) -> list:
+        """(timestamp, command) pairs, oldest first. Entry n is entries()[n - 1]."""
+        with self._lock:
+            if self._entries is None:
+                self._load()
+            return self._entries
+
+    def get(self, number: int) -> str:
+        """Command number n (1-based), negative numbers count back from the newest."""
+        entries = self.entries()
+        index = number - 1 if number > 0 else len(entries) + number
+        if number == 0 or not 0 <= index < len(entries):
+            raise ValueError(f"history: no entry {number}")
+        return entries[index][1]
+
+    def expand(self, line: str) -> str | None:
+        """The command recalled by '!n', '!-n' or '!!', or None if line is not a recall."""
+        match = _RECALL.match(line.strip())
+        if not match:
+            return None
+        return self.get(-1 if match.group(1) == "!" else int(match.group(1)))
+
+    def prewarm(self):
+        """Load the history and build the search index on a background thread."""
+        with self._lock:
+            if self._indexing or self._trigrams is not None:
+                return
+            self._indexing = True
+        threading.Thread(target=self._build_index, name="pyterminal-history-index", daemon=True).start()
+
+    def search(self, text: str, limit: int | None = None):
+        """Yield (number, timestamp, command) for entries containing text, newest first."""
+        entries = self.entries()
+        needle = text.lower()
+        with self._lock:
+            trigrams, lowered = self._trigrams, self._lowered
+            count = len(entries)
+        if trigrams is None:
+            self.prewarm()
+        if trigrams is None or len(needle) < 3:
+            candidates = range(count - 1, -1, -1)
+        else:
+            # Every match contains the query's rarest trigram, the rest is checked directly
+            candidates = reversed(min((trigrams.get(t, ()) for t in _trigrams(needle)), key=len))
+        found = 0
+        for index in candidates:
+            timestamp, command = entries[index]
+            if needle in (lowered[index] if lowered is not None else command.lower()):
+                yield index + 1, timestamp, command
+                found += 1
+                if limit is not None and found >= limit:
+                    return
+
+    def tail(self, count: int) -> list:
+        """The newest commands (up to count) read from the end of the file, oldest first."""
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                start = max(0, f.tell() - _TAIL_BYTES)
+                f.seek(start)
+                lines = f.read().decode("utf-8", errors="replace").splitlines()
+        except OSError:
+            return []
+        if start:
+            lines = lines[1:]  # Most likely cut in the middle
+        commands = [line.partition("\t")[2] for line in lines if "\t" in line]
+        return commands[-count:]
+
+    def _load(self):
+        self._entries = []
+        try:
+            with open(self.path, "r", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    timestamp, sep, command = line.rstrip("\n").partition("\t")
+                    if sep:
+                        try:
+                            self._entries.append((float(timestamp), command))
+                        except ValueError:
+                            continue
+        except FileNotFoundError:
+            pass
+        # Queued entries the writer hasn't reached yet
+        self._entries.extend(self._pending)
+
+    def _build_index(self):
+        # Built without holding the lock, entries appended meanwhile are added at the end
+        entries = self.entries()
+        with self._lock:
+            count = len(entries)
+        index_map, lowered = {}, []
+        for index, (_, command) in enumerate(entries[:count]):
+            lowered.append(command.lower())
+            for trigram in _trigrams(command):
+                index_map.setdefault(trigram, array("I")).append(index)
+        with self._lock:
+            self._indexing = False
+            if self._entries is not entries:
+                return  # Rotated while building
+            self._trigrams, self._lowered = index_map, lowered
+            for index in range(count, len(entries)):
+                self._index_entry(index, entries[index][1])
+
+    def _add(self, timestamp: float, command: str):
+        self._entries.append((timestamp, command))
+        if self._trigrams is not None:
+            self._index_entry(len(self._entries) - 1, command)
+
+    def _index_entry(self, index: int, command: str):
+        self._lowered.append(command.lower())
+        for trigram in _trigrams(command):
+            self._trigrams.setdefault(trigram, array("I")).append(index)
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            # Write everything queued so far in one go
+            while not self._queue.empty():
+                item = self._queue.get()
+                if item is None:
+                    self._write(batch)
+                    return
+                batch.append(item)
+            self._write(batch)
+
+    def _write(self, batch: list):
+        text = "".join(f"{timestamp:.3f}\t{command}\n" for timestamp, command in batch)
+        # Under the lock so a concurrent load sees every entry exactly once
+        with self._lock:
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(text)
+                    size = f.tell()
+                if size > self.max_bytes:
+                    self._rotate()
+            except OSError:
+                pass
+            for _ in batch:
+                self._pending.popleft()
+
+    def _rotate(self):
+        with open(self.path, "r", encoding="utf-8", errors="replace") as f:
+            lines = f.readlines()
+        keep = len(lines) // 2
+        with open(self.path + ".1", "w", encoding="utf-8") as f:
+            f.writelines(lines[:keep])
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            f.writelines(lines[keep:])
+        os.replace(self.path + ".tmp", self.path)
+        # Entry numbers follow the file, so reload on next use
+        self._entries = None
+        self._trigrams = None
+        self._lowered = None
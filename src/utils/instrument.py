@@ -0,0 +1,144 @@
+import contextlib
+import json
+import math
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque, namedtuple
+
+# One finished measurement; peak is the tracemalloc peak above the start (None if not traced)
+Span = namedtuple("Span", ["kind", "name", "started", "wall", "cpu", "peak"])
+
+# Spans kept per (kind, name) for percentiles
+SPANS_PER_NAME = 10000
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+def percentile(sorted_values: list, fraction: float):
+    """Nearest-rank percentile of an already sorted, non-empty list."""
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+class _ActiveSpan:
+    def __init__(self, recorder, kind: str, name: str):
+        self.recorder = recorder
+        self.kind = kind
+        self.name = name
+        self.peak_abs = 0
+
+    def __enter__(self):
+        self.parent = self.recorder._stack()[-1] if self.recorder._stack() else None
+        self.recorder._stack().append(self)
+        if self.recorder.trace_memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if self.parent is not None:
+                self.parent.peak_abs = max(self.parent.peak_abs, peak)
+            tracemalloc.reset_peak()
+            self.mem_start = self.peak_abs = current
+        else:
+            self.mem_start = None
+        self.started = time.time()
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.wall_start
+        cpu = time.process_time() - self.cpu_start
+        peak = None
+        if self.mem_start is not None and tracemalloc.is_tracing():
+            self.peak_abs = max(self.peak_abs, tracemalloc.get_traced_memory()[1])
+            peak = self.peak_abs - self.mem_start
+            if self.parent is not None:
+                self.parent.peak_abs = max(self.parent.peak_abs, self.peak_abs)
+        self.recorder._stack().pop()
+        self.recorder.record(Span(self.kind, self.name, self.started, wall, cpu, peak))
+        return False
+
+
+class Instrumentation:
+    """
+    Wall time, CPU time and (optionally) peak Python memory of commands, AI tool
+    calls and model requests, kept for the session.
+    - Off by default: span() then returns a shared no-op context manager
+    - trace_memory uses tracemalloc, which slows allocations down noticeably, so it is
+      opt-in. Peaks of concurrent spans (parallel tool calls) overlap
+    - CPU time is process-wide, so it includes worker threads a command started
+    """
+
+    def __init__(self):
+        self.enabled = bool(os.environ.get("PYTERMINAL_STATS"))
+        self.trace_memory = False
+        self._spans = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def span(self, kind: str, name: str):
+        """Context manager measuring one command / tool call / model request."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _ActiveSpan(self, kind, name)
+
+    def enable(self, trace_memory: bool = False):
+        self.enabled = True
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def disable(self):
+        self.enabled = False
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.trace_memory = False
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+
+    def record(self, span: Span):
+        with self._lock:
+            spans = self._spans.get((span.kind, span.name))
+            if spans is None:
+                spans = self._spans[(span.kind, span.name)] = deque(maxlen=SPANS_PER_NAME)
+            spans.append(span)
+
+    def spans(self) -> list:
+        """Every recorded span, oldest first."""
+        with self._lock:
+            return sorted((s for spans in self._spans.values() for s in spans), key=lambda s: s.started)
+
+    def summary(self) -> list:
+        """(kind, name, count, p50, p90, p99, max, cpu mean, peak max) per measured name."""
+        with self._lock:
+            groups = {key: list(spans) for key, spans in self._spans.items()}
+        rows = []
+        for (kind, name), spans in sorted(groups.items()):
+            walls = sorted(s.wall for s in spans)
+            peaks = [s.peak for s in spans if s.peak is not None]
+            rows.append((
+                kind, name, len(spans),
+                percentile(walls, 0.5), percentile(walls, 0.9), percentile(walls, 0.99), walls[-1],
+                sum(s.cpu for s in spans) / len(spans),
+                max(peaks) if peaks else None,
+            ))
+        return rows
+
+    def export(self, path: str) -> int:
+        """Append every recorded span to path as JSON lines. Returns the number written."""
+        spans = self.spans()
+        with open(path, "a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span._asdict()) + "\n")
+        return len(spans)
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+
+# Shared by the parser, the AI loop and the stats command
+instrumentation = Instrumentation()
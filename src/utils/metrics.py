@@ -0,0 +1,90 @@
+import threading
+import time
+from collections import deque, namedtuple
+
+# One reading of the system, per_cpu holds one percentage per logical core
+Sample = namedtuple("Sample", ["timestamp", "cpu", "per_cpu", "mem", "load"])
+
+
+class MetricsCollector:
+    """
+    Background sampler for CPU, memory and load average.
+    - Runs on a daemon thread, taking one sample every `interval` seconds
+    - Keeps the last `history` samples in a ring buffer
+    - Readers never block on psutil, they only look at the latest samples
+    """
+
+    def __init__(self, interval: float = 1.0, history: int = 300):
+        if interval <= 0:
+            raise ValueError("sampling interval must be positive")
+        self.interval = interval
+        self._samples = deque(maxlen=history)
+        self._lock = threading.Lock()
+        self._first_sample = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="pyterminal-metrics", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def _run(self):
+        # psutil is imported here, off the startup path
+        import psutil
+
+        # cpu_percent(None) measures since the previous call, so prime it first
+        psutil.cpu_percent(interval=None, percpu=True)
+        while not self._stop.wait(self.interval):
+            try:
+                sample = self._take_sample()
+            except Exception:
+                continue
+            with self._lock:
+                self._samples.append(sample)
+            self._first_sample.set()
+
+    def _take_sample(self) -> Sample:
+        import psutil
+
+        per_cpu = psutil.cpu_percent(interval=None, percpu=True)
+        try:
+            load = psutil.getloadavg()
+        except (AttributeError, OSError):
+            load = None
+        return Sample(
+            timestamp=time.time(),
+            cpu=sum(per_cpu) / len(per_cpu) if per_cpu else 0.0,
+            per_cpu=per_cpu,
+            mem=psutil.virtual_memory(),
+            load=load,
+        )
+
+    def latest(self) -> Sample | None:
+        """
+        Most recent sample. The first one is only taken an interval after start, once
+        psutil is imported, so this waits up to two intervals for it (None if it never came).
+        """
+        if not self._first_sample.wait(timeout=self.interval * 2):
+            return None
+        with self._lock:
+            return self._samples[-1]
+
+    def window(self, seconds: float) -> list:
+        """All samples taken within the last `seconds` seconds, oldest first."""
+        cutoff = time.time() - seconds
+        with self._lock:
+            return [s for s in self._samples if s.timestamp >= cutoff]
+
+
+def summarize(values) -> tuple:
+    """(min, avg, max) of a non-empty sequence of numbers."""
+    values = list(values)
+    return min(values), sum(values) / len(values), max(values)
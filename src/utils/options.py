@@ -0,0 +1,31 @@
+def parse_options(cmd: str, args, spec: dict):
+    """
+    Split command arguments into options and positional arguments.
+    - spec maps an option name (e.g. "--limit") to a converter such as int or str,
+      or to bool for flags that take no value.
+    - Returns (options, positionals); options only contains the names that were given.
+    - Raises ValueError with a user facing message on unknown or malformed options.
+    """
+    options = {}
+    positionals = []
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in spec:
+            kind = spec[arg]
+            if kind is bool:
+                options[arg] = True
+            else:
+                if i + 1 >= len(args):
+                    raise ValueError(f"{cmd}: option {arg} requires a value")
+                try:
+                    options[arg] = kind(args[i + 1])
+                except ValueError:
+                    raise ValueError(f"{cmd}: invalid value for {arg}: {args[i + 1]}")
+                i += 1
+        elif arg.startswith("--") and len(arg) > 2:
+            raise ValueError(f"{cmd}: unknown option {arg}")
+        else:
+            positionals.append(arg)
+        i += 1
+    return options, positionals
@@ -0,0 +1,187 @@
+import sys
+from collections import namedtuple
+from rich.console import Console
+from rich.errors import MarkupError
+from rich.table import Table
+from rich.text import Text
+
+# Rows rendered per Rich table when a table is streamed in chunks
+TABLE_CHUNK_ROWS = 500
+
+# A table column: rows hold raw values, `format` turns one into display text
+Column = namedtuple("Column", ["name", "style", "justify", "format"], defaults=(None, "left", str))
+
+
+def _cell(column: Column, value) -> str:
+    return "" if value is None else column.format(value)
+
+
+def row_text(columns, row) -> str:
+    """A row as one line of tab separated display values."""
+    return "\t".join(_cell(column, value) for column, value in zip(columns, row))
+
+
+def plain(message: str) -> str:
+    """Strip Rich markup from a message, leaving it untouched if it is not valid markup."""
+    try:
+        return Text.from_markup(message).plain
+    except MarkupError:
+        return message
+
+
+class Output:
+    """
+    Destination for the results of a single command call.
+    Commands describe what they produce (messages, tables, raw text) and the
+    output decides what to do with it, so no command touches a shared console.
+    - ok turns False once an error was reported
+    - interactive is True only when a user is watching a live terminal
+    """
+
+    interactive = False
+
+    def __init__(self):
+        self.ok = True
+
+    def info(self, message: str):
+        """A status line, may contain Rich markup."""
+        raise NotImplementedError
+
+    def error(self, message: str):
+        """An error line, may contain Rich markup. Marks the call as failed."""
+        self.ok = False
+        self.info(message)
+
+    def table(self, columns, rows, title: str | None = None) -> int:
+        """Emit rows (an iterable of tuples of raw values). Returns the number of rows consumed."""
+        raise NotImplementedError
+
+    def text(self, chunks):
+        """Emit raw text (an iterable of str chunks), never interpreted as markup."""
+        raise NotImplementedError
+
+
+class ConsoleOutput(Output):
+    """Renders results with Rich as they arrive. Large tables are printed in chunks."""
+
+    def __init__(self, console: Console, interactive: bool = True):
+        super().__init__()
+        self.console = console
+        self.interactive = interactive
+
+    def info(self, message: str):
+        self.console.print(message)
+
+    def table(self, columns, rows, title: str | None = None) -> int:
+        shown = 0
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= TABLE_CHUNK_ROWS:
+                # Streaming: give every chunk the full width so columns line up
+                self.console.print(self._render(columns, chunk, title if shown == 0 else None,
+                                                header=shown == 0, expand=True))
+                shown += len(chunk)
+                chunk = []
+        if chunk or shown == 0:
+            self.console.print(self._render(columns, chunk, title if shown == 0 else None,
+                                            header=shown == 0, expand=shown > 0))
+            shown += len(chunk)
+        return shown
+
+    def _render(self, columns, rows, title, header: bool, expand: bool) -> Table:
+        table = Table(title=title, show_header=header, expand=expand)
+        for column in columns:
+            table.add_column(column.name, style=column.style, justify=column.justify)
+        for row in rows:
+            table.add_row(*(_cell(column, value) for column, value in zip(columns, row)))
+        return table
+
+    def text(self, chunks):
+        # Straight to the underlying file: no markup parsing or re-wrapping by Rich.
+        # Flushed per chunk so output that trickles in (tail -f) shows up right away
+        for chunk in chunks:
+            self.console.file.write(chunk)
+            self.console.file.flush()
+
+
+class PlainOutput(Output):
+    """
+    Writes results as plain, uncoloured text to a file (stdout by default), for
+    scripts, CI and pipes. Tables become tab separated lines.
+    """
+
+    def __init__(self, file=None):
+        super().__init__()
+        self.file = file if file is not None else sys.stdout
+
+    def info(self, message: str):
+        self.file.write(plain(message) + "\n")
+
+    def table(self, columns, rows, title: str | None = None) -> int:
+        if title:
+            self.file.write(title + "\n")
+        self.file.write("\t".join(column.name for column in columns) + "\n")
+        shown = 0
+        for row in rows:
+            self.file.write(row_text(columns, row) + "\n")
+            shown += 1
+        return shown
+
+    def text(self, chunks):
+        last = ""
+        for chunk in chunks:
+            self.file.write(chunk)
+            self.file.flush()
+            last = chunk or last
+        # Keep the next command's output on its own line
+        if last and not last.endswith("\n"):
+            self.file.write("\n")
+        self.file.flush()
+
+
+class CaptureOutput(Output):
+    """
+    Collects results as structured records instead of rendering them.
+    Each record is a dict with a "type" of "message", "table" or "text".
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def info(self, message: str):
+        self.records.append({"type": "message", "level": "info", "text": plain(message)})
+
+    def error(self, message: str):
+        self.ok = False
+        self.records.append({"type": "message", "level": "error", "text": plain(message)})
+
+    def table(self, columns, rows, title: str | None = None) -> int:
+        rows = [tuple(row) for row in rows]
+        self.records.append({"type": "table", "title": title, "columns": list(columns), "rows": rows})
+        return len(rows)
+
+    def text(self, chunks):
+        self.records.append({"type": "text", "text": "".join(chunks)})
+
+    @staticmethod
+    def row_lines(record) -> list:
+        """The rows of a table record as tab separated lines, formatted once and kept with the record."""
+        lines = record.get("lines")
+        if lines is None:
+            lines = record["lines"] = [row_text(record["columns"], row) for row in record["rows"]]
+        return lines
+
+    def render(self) -> str:
+        """Plain text version of the records: tables become tab separated lines."""
+        parts = []
+        for record in self.records:
+            if record["type"] == "table":
+                lines = [record["title"]] if record["title"] else []
+                lines.append("\t".join(column.name for column in record["columns"]))
+                lines += self.row_lines(record)
+                parts.append("\n".join(lines))
+            else:
+                parts.append(record["text"].rstrip("\n"))
+        return "\n".join(parts).strip()
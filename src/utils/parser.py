@@ -1,17 +1,48 @@
 import shlex
-from io import StringIO
-import sys
 from commands.filesystem import FileSystemCommands
 from commands.system import SystemCommands
 from commands.info import InfoCommands
+from commands.history import HistoryCommands
+from commands.filters import FilterCommands
+from commands.stats import StatsCommands
+from commands.context import ContextCommands
+from utils.conversation import Conversation
+from utils.history import History
+from utils.instrument import instrumentation
+from utils.metrics import MetricsCollector
+from utils.output import CaptureOutput, ConsoleOutput, Output
+from utils.pipeline import PipeOutput, split_pipeline
 
 
 class CommandParser:
-    def __init__(self, console):
+    def __init__(self, console, sample_interval: float = 1.0, sample_history: int = 300, shared=None):
+        """
+        - sample_interval: seconds between background CPU/memory samples
+        - sample_history: number of samples kept for windowed statistics
+        - shared: a CommandParser whose long-lived state (metrics sampler, history,
+          file index, du cache) is reused, as by the sessions of the daemon. The
+          working directory is never shared and cd doesn't touch the process directory
+        """
         self.console = console
-        self.fs = FileSystemCommands(console)
-        self.sys = SystemCommands(console)
-        self.info = InfoCommands(console)
+        if shared is None:
+            self.metrics = MetricsCollector(interval=sample_interval, history=sample_history)
+            self.metrics.start()
+            self.fs = FileSystemCommands()
+            self.history = History()
+        else:
+            self.metrics = shared.metrics
+            self.fs = FileSystemCommands(file_index=shared.fs.file_index, change_process_dir=False)
+            self.fs.current_dir = shared.fs.current_dir
+            self.fs.disk_usage = shared.fs.disk_usage
+            self.history = shared.history
+        self.sys = SystemCommands(self.metrics)
+        self.info = InfoCommands()
+        self.hist = HistoryCommands(self.history)
+        self.filters = FilterCommands()
+        self.stats = StatsCommands(instrumentation)
+        # Earlier !ai turns of this session, never shared between sessions
+        self.conversation = Conversation()
+        self.ctx = ContextCommands(self.conversation)
 
         self.commands = {
             "ls": self.fs.ls,
@@ -19,57 +50,109 @@ class CommandParser:
             "cd": self.fs.cd,
             "mkdir": self.fs.mkdir,
             "cat": self.fs.cat,
+            "tail": self.fs.tail,
             "rm": self.fs.rm,
             "mv": self.fs.mv,
+            "cp": self.fs.cp,
+            "find": self.fs.find,
+            "grep": self.fs.grep,
+            "index": self.fs.index,
+            "du": self.fs.du,
             "cpu": self.sys.cpu,
             "mem": self.sys.mem,
             "processes": self.sys.processes,
+            "watch": self.sys.watch,
+            "top": self.sys.watch,
+            "history": self.hist.show_history,
+            "stats": self.stats.stats,
+            "context": self.ctx.context,
             "help": self.info.show_commands,
         }
 
-    def execute(self, user_input: str, capture_output: bool = False, content: str | None = None) -> str | None:
+        # Commands that can read the records of the command before them in a pipeline
+        self.pipe_filters = {
+            "grep": self.filters.grep,
+            "head": self.filters.head,
+            "sort": self.filters.sort,
+            "wc": self.filters.wc,
+            "count": self.filters.count,
+        }
+
+    def run(self, user_input: str, out: Output, content: str | None = None) -> int:
         """
-        Execute a command.
-        - capture_output=True: return output as string instead of printing.
+        Execute a command, sending its results to `out`.
         - content: optional string to pass to commands that accept it (e.g., cat).
+        Returns an exit status: 0 on success, 1 on command errors, 2 on usage errors
+        and 127 for unknown commands.
         """
+        name = user_input.split(None, 1)[0] if user_input.strip() else ""
+        with instrumentation.span("command", name):
+            return self._run(user_input, out, content)
+
+    def _run(self, user_input: str, out: Output, content: str | None = None) -> int:
         try:
+            stages = split_pipeline(user_input)
+            if len(stages) > 1:
+                return self._run_pipeline(stages, out)
+
             tokens = shlex.split(user_input.strip())
             if not tokens:
-                return ""
+                return 0
 
             cmd, *args = tokens
             if cmd not in self.commands:
-                msg = f"[red]Unknown command:[/red] {cmd}"
-                if capture_output:
-                    self.console.print(msg)
-                    return msg
-                self.console.print(msg)
-                return ""
-
-            if capture_output:
-                # Redirect stdout temporarily
-                old_stdout = sys.stdout
-                sys.stdout = buffer = StringIO()
+                out.error(f"[red]Unknown command:[/red] {cmd}")
+                return 127
 
             # Pass content to command if it accepts it
             if cmd == "cat":
-                self.commands[cmd](args, content=content)
+                self.commands[cmd](args, out, content=content)
             else:
-                self.commands[cmd](args)
-
-            if capture_output:
-                sys.stdout = old_stdout
-                return buffer.getvalue().strip()
+                self.commands[cmd](args, out)
 
         except ValueError as e:
-            msg = f"[red]Parsing error:[/red] {e}"
-            if capture_output:
-                return msg
-            self.console.print(msg)
+            out.error(f"[red]Parsing error:[/red] {e}")
+            return 2
         except Exception as e:
-            msg = f"[red]Error executing command:[/red] {e}"
-            if capture_output:
-                return msg
-            self.console.print(msg)
+            out.error(f"[red]Error executing command:[/red] {e}")
+            return 1
+        return 0 if out.ok else 1
 
+    def _run_pipeline(self, stages, out: Output) -> int:
+        """
+        Run `cmd | filter | ...`. The first stage is any command, later stages must be
+        pipe filters. Stages are chained through PipeOutput, so records are pulled
+        through every filter one at a time as the first command produces them.
+        """
+        parsed = [shlex.split(stage) for stage in stages]
+        if not all(parsed):
+            raise ValueError("empty command in pipeline")
+        (cmd, *args), filters = parsed[0], parsed[1:]
+        if cmd not in self.commands:
+            out.error(f"[red]Unknown command:[/red] {cmd}")
+            return 127
+
+        # Built from the last stage backwards, parsing every filter's arguments first
+        sink = out
+        for name, *filter_args in reversed(filters):
+            if name not in self.pipe_filters:
+                filters_list = ", ".join(self.pipe_filters)
+                raise ValueError(f"cannot pipe into '{name}' (filters: {filters_list})")
+            sink = PipeOutput(self.pipe_filters[name](filter_args), sink, out)
+
+        self.commands[cmd](args, sink)
+        return 0 if out.ok and sink.ok else 1
+
+    def execute(self, user_input: str, capture_output: bool = False, content: str | None = None) -> str | None:
+        """
+        Execute a command.
+        - capture_output=True: return output as plain text instead of printing.
+          Results are collected per call, so concurrent captures don't interfere.
+        - content: optional string to pass to commands that accept it (e.g., cat).
+        """
+        if capture_output:
+            out = CaptureOutput()
+            self.run(user_input, out, content=content)
+            return out.render()
+        self.run(user_input, ConsoleOutput(self.console), content=content)
+        return ""
@@ -0,0 +1,11 @@
+import os
+
+
+def data_dir() -> str:
+    """
+    Directory for PyTerminal's persistent state (caches, history, indexes).
+    Defaults to ~/.pyterminal and can be moved with the PYTERMINAL_HOME variable.
+    """
+    path = os.environ.get("PYTERMINAL_HOME") or os.path.join(os.path.expanduser("~"), ".pyterminal")
+    os.makedirs(path, exist_ok=True)
+    return path
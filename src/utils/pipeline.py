@@ -0,0 +1,106 @@
+from utils.batch import split_unquoted
+from utils.output import Column, Output
+
+# Column of the record stream made from a command's raw text output, one row per line
+LINE_COLUMN = Column("Line", "white")
+
+
+def split_pipeline(text: str) -> list:
+    """Split a command line on '|' characters that are not inside quotes."""
+    return [stage.strip() for stage in split_unquoted(text, "|")]
+
+
+def iter_lines(chunks):
+    """Re-split a stream of text chunks into lines (without their newline)."""
+    pending = ""
+    for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split("\n")
+        yield from lines
+    if pending:
+        yield pending
+
+
+class Stream:
+    """
+    Records flowing between two pipeline stages: rows are tuples of raw values
+    pulled lazily from the upstream command. text is True when the rows are the
+    lines of a command's text output, so they are written back out as text.
+    """
+
+    def __init__(self, columns, rows, title: str | None = None, text: bool = False):
+        self.columns = list(columns)
+        self.rows = rows
+        self.title = title
+        self.text = text
+
+    def emit(self, out: Output, rows) -> int:
+        """Send (possibly filtered) rows of this stream on to out, in the stream's own form."""
+        if not self.text:
+            return out.table(self.columns, rows, self.title)
+        count = 0
+
+        def lines():
+            nonlocal count
+            for row in rows:
+                count += 1
+                yield row[0] + "\n"
+
+        out.text(lines())
+        return count
+
+
+class PipeOutput(Output):
+    """
+    Output of one pipeline stage that feeds the next stage directly.
+    - Tables and text are handed to the next stage's filter as a lazy Stream while
+      the upstream command is still producing them, so a filter that stops early
+      (head) stops the upstream scan too
+    - Errors go to the final output, status messages of upstream stages are dropped
+    """
+
+    def __init__(self, apply, downstream: Output, final: Output):
+        super().__init__()
+        self.apply = apply
+        self.downstream = downstream
+        self.final = final
+        self.interactive = False
+
+    def info(self, message: str):
+        pass
+
+    def error(self, message: str):
+        self.ok = False
+        self.final.error(message)
+
+    def table(self, columns, rows, title: str | None = None) -> int:
+        return self._feed(Stream(columns, iter(rows), title))
+
+    def text(self, chunks):
+        chunks = iter(chunks)
+        try:
+            self._feed(Stream([LINE_COLUMN], ((line,) for line in iter_lines(chunks)), text=True))
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+
+    def _feed(self, stream: Stream) -> int:
+        source = stream.rows
+        consumed = 0
+
+        def counted():
+            nonlocal consumed
+            for row in source:
+                consumed += 1
+                yield row
+
+        stream.rows = counted()
+        try:
+            self.apply(stream, self.downstream)
+        finally:
+            # Release whatever the upstream generator holds (files, walker threads)
+            close = getattr(source, "close", None)
+            if close is not None:
+                close()
+        return consumed
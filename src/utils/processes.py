@@ -0,0 +1,93 @@
+import re
+
+# Attributes a process row can carry and the psutil call that fetches each one
+_FETCHERS = {
+    "name": lambda p: p.name(),
+    "user": lambda p: p.username(),
+    "cpu": lambda p: p.cpu_percent(interval=None),
+    "rss": lambda p: p.memory_info().rss,
+}
+
+
+class ProcessCache:
+    """
+    Keeps psutil.Process objects alive between scans.
+    - cpu_percent(None) on a cached Process measures since the previous scan,
+      so CPU usage is meaningful without sleeping
+    - Only pids that appeared or disappeared since the last scan touch psutil objects
+    psutil itself is imported on first use, off the startup path.
+    """
+
+    def __init__(self):
+        self._procs = {}
+
+    def refresh(self) -> tuple:
+        """Sync the cache with the running pids, returning (new_pids, gone_pids)."""
+        import psutil
+
+        pids = set(psutil.pids())
+        known = set(self._procs)
+        gone = known - pids
+        new = pids - known
+        for pid in gone:
+            del self._procs[pid]
+        for pid in new:
+            try:
+                proc = psutil.Process(pid)
+                # Start the CPU measurement window for this process
+                proc.cpu_percent(interval=None)
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+            self._procs[pid] = proc
+        return new, gone
+
+    def __len__(self):
+        return len(self._procs)
+
+    def rows(self, attrs, name_pattern: str | None = None, user: str | None = None, skip_cpu=()):
+        """
+        Yield one dict per process holding "pid" plus the requested attrs.
+        - name_pattern / user filter processes before the remaining attrs are fetched
+        - pids in skip_cpu report cpu as None (no measurement window yet)
+        Rows come in pid order. Processes that exit or deny access mid-scan are
+        skipped or shown partially.
+        """
+        regex = re.compile(name_pattern) if name_pattern else None
+        attrs = list(attrs)
+        # Fetch the filtering attributes first so filtered out processes cost the least
+        order = [a for a in ("name", "user") if a in attrs or (a == "name" and regex) or (a == "user" and user)]
+        order += [a for a in attrs if a not in order]
+
+        for pid, proc in sorted(self._procs.items()):
+            row = self._fetch(pid, proc, order, regex, user, skip_cpu)
+            if row is not None:
+                yield row
+
+    def fetch(self, pid: int, attrs) -> dict | None:
+        """Row for a single cached pid, or None if it is unknown or has exited."""
+        proc = self._procs.get(pid)
+        if proc is None:
+            return None
+        return self._fetch(pid, proc, list(attrs), None, None, ())
+
+    def _fetch(self, pid, proc, order, regex, user, skip_cpu) -> dict | None:
+        import psutil
+
+        row = {"pid": pid}
+        try:
+            with proc.oneshot():
+                for attr in order:
+                    if attr == "cpu" and pid in skip_cpu:
+                        row["cpu"] = None
+                        continue
+                    try:
+                        row[attr] = _FETCHERS[attr](proc)
+                    except psutil.AccessDenied:
+                        row[attr] = None
+                    if attr == "name" and regex and not regex.search(row["name"] or ""):
+                        return None
+                    if attr == "user" and user and row["user"] != user:
+                        return None
+        except (psutil.NoSuchProcess, psutil.ZombieProcess):
+            return None
+        return row
@@ -0,0 +1,80 @@
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Threads scanning directories (or searching files) concurrently
+WALK_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+
+class WalkErrors:
+    """Counts directories that could not be read during a walk."""
+
+    def __init__(self):
+        self.count = 0
+        self.last = None
+        self._lock = threading.Lock()
+
+    def add(self, error: OSError):
+        with self._lock:
+            self.count += 1
+            self.last = error
+
+
+def _scan(path: str, errors: WalkErrors | None):
+    try:
+        with os.scandir(path) as it:
+            return list(it)
+    except OSError as e:
+        if errors is not None:
+            errors.add(e)
+        return []
+
+
+def walk(root: str, workers: int = WALK_WORKERS, errors: WalkErrors | None = None, follow_symlinks: bool = False):
+    """
+    Yield os.DirEntry objects for everything below root (root itself excluded).
+    - Directories are scanned concurrently on a thread pool, entries are yielded
+      as soon as their directory has been read, in no particular order
+    - Closing the generator early (break, islice, max results) cancels pending scans
+    - Unreadable directories are skipped and counted in errors
+    """
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pyterminal-walk")
+    try:
+        pending = {pool.submit(_scan, root, errors)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for entry in future.result():
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=follow_symlinks)
+                    except OSError:
+                        is_dir = False
+                    if is_dir:
+                        pending.add(pool.submit(_scan, entry.path, errors))
+                    yield entry
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def parallel_map(func, items, workers: int = WALK_WORKERS, window: int | None = None):
+    """
+    Yield func(item) for items as results complete, with at most `window` calls in
+    flight so a huge (or streamed) input is never queued up front. Closing the
+    generator early cancels the calls that have not started.
+    """
+    window = window or workers * 4
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pyterminal-map")
+    try:
+        pending = set()
+        for item in items:
+            pending.add(pool.submit(func, item))
+            if len(pending) >= window:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,22 @@
+import os
+import sys
+import pytest
+from rich.console import Console
+
+# The application imports its modules from src/ (utils.*, commands.*)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+
+@pytest.fixture
+def parser(tmp_path, monkeypatch):
+    """A CommandParser in an empty working directory, with its state kept under tmp_path."""
+    from utils.parser import CommandParser
+
+    monkeypatch.setenv("PYTERMINAL_HOME", str(tmp_path / "home"))
+    work = tmp_path / "work"
+    work.mkdir()
+    parser = CommandParser(Console(quiet=True))
+    parser.fs.current_dir = str(work)
+    yield parser
+    parser.metrics.stop()
+    parser.history.close()
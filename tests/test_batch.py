@@ -0,0 +1,13 @@
+from utils.batch import split_commands
+
+
+def test_semicolon_in_comment_does_not_split_it():
+    assert split_commands("# cleanup; rm -r build\nls") == ["ls"]
+
+
+def test_quote_in_comment_does_not_swallow_later_commands():
+    assert split_commands("# don't touch\nls\npwd") == ["ls", "pwd"]
+
+
+def test_quoted_separators_are_kept():
+    assert split_commands('ls; echo "a;b"\n  # note\npwd') == ["ls", 'echo "a;b"', "pwd"]
@@ -0,0 +1,34 @@
+import os
+from utils.output import CaptureOutput
+
+
+def _write(parser, name: str, text: str) -> str:
+    path = os.path.join(parser.fs.current_dir, name)
+    with open(path, "w") as f:
+        f.write(text)
+    return path
+
+
+def test_cat_into_its_own_source_keeps_the_file(parser):
+    path = _write(parser, "k", "keep me\n")
+    assert parser.run("cat k > k", CaptureOutput()) == 1
+    with open(path) as f:
+        assert f.read() == "keep me\n"
+
+
+def test_mv_across_filesystems_onto_existing_destination_reports_error(parser, monkeypatch):
+    import errno
+
+    def cross_device(src, dst):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    os.makedirs(os.path.join(parser.fs.current_dir, "src", "sub"))
+    _write(parser, "src/sub/a", "a\n")
+    os.makedirs(os.path.join(parser.fs.current_dir, "dest"))
+    monkeypatch.setattr(os, "rename", cross_device)
+    out = CaptureOutput()
+    # dest/src is already taken, so creating the copy's root fails
+    _write(parser, "dest/src", "in the way\n")
+    assert parser.run("mv src dest", out) == 1
+    assert "mv:" in out.render()
+    assert os.path.exists(os.path.join(parser.fs.current_dir, "src", "sub", "a"))
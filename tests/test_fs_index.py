@@ -0,0 +1,40 @@
+import os
+from utils.fs_index import FileIndex
+
+
+def _touch(*parts):
+    os.makedirs(os.path.dirname(os.path.join(*parts)), exist_ok=True)
+    open(os.path.join(*parts), "w").close()
+
+
+def _indexed_tree(tmp_path):
+    root = str(tmp_path / "root")
+    for name in ("a/one.py", "a/two.txt", "b/three.py", "b/deep/four.py"):
+        _touch(root, name)
+    index = FileIndex(str(tmp_path / "index.db"))
+    index.rebuild(root)
+    return index, root
+
+
+def test_refresh_checks_only_the_searched_subtree_and_its_parents(tmp_path):
+    index, root = _indexed_tree(tmp_path)
+    _touch(root, "a", "new.py")
+    checked, rescanned = index.refresh(os.path.join(root, "b"))
+    # root and b/ and b/deep/, not a/
+    assert (checked, rescanned) == (3, 0)
+    assert index.refresh(root) == (4, 1)
+
+
+def test_refresh_of_a_subtree_finds_a_new_directory(tmp_path):
+    index, root = _indexed_tree(tmp_path)
+    _touch(root, "c", "five.py")
+    index.refresh(os.path.join(root, "c"))
+    assert [path for path, *_ in index.search(os.path.join(root, "c"))] == [os.path.join(root, "c", "five.py")]
+
+
+def test_search_filters_name_and_type_in_sql(tmp_path):
+    index, root = _indexed_tree(tmp_path)
+    found = sorted(os.path.relpath(path, root) for path, *_ in index.search(root, "*.py", "f"))
+    assert found == ["a/one.py", "b/deep/four.py", "b/three.py"]
+    assert sorted(os.path.relpath(p, root) for p, *_ in index.search(root, "[!t]*", "f")) == ["a/one.py", "b/deep/four.py"]
+    assert sorted(os.path.relpath(p, root) for p, *_ in index.search(root, kind="d")) == ["a", "b", "b/deep"]
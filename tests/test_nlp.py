@@ -0,0 +1,26 @@
+import os
+import tracemalloc
+from nlp import FILE_WINDOW_BYTES, handle_function_call
+
+LARGE_FILE_BYTES = 20 * 1024 * 1024
+
+
+def test_cat_file_reads_only_a_window_of_a_large_file(parser):
+    path = os.path.join(parser.fs.current_dir, "big.log")
+    with open(path, "w") as f:
+        for i in range(LARGE_FILE_BYTES // 32):
+            f.write(f"line {i:08d} {'x' * 17}\n")
+
+    tracemalloc.start()
+    try:
+        output = handle_function_call("cat_file", {"files": ["big.log"]}, parser, parser.console)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    text = output.render()
+    assert peak < LARGE_FILE_BYTES // 10
+    assert len(text) < FILE_WINDOW_BYTES + 100
+    assert text.startswith("line 00000000 ")
+    assert f"line {LARGE_FILE_BYTES // 32 - 1:08d} " in text
+    assert "bytes omitted" in text